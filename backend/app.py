@@ -5,7 +5,7 @@ import uuid
 from datetime import datetime
 import boto3
 from botocore.exceptions import ClientError
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Key, Attr
 import anthropic
 import base64
 import io
@@ -14,6 +14,19 @@ from decimal import Decimal
 import time
 from dotenv import load_dotenv
 import json
+from urllib.parse import unquote_plus
+from services.jobs import JobManager
+from services.label_cache import LabelCacheService, RateLimiter, content_hash, derive_tags
+from services.pagination import encode_cursor, decode_cursor, parse_limit
+from services.tab_views import TabViewService, match_tab_tag
+from services.image_index import ImageIndexService
+from services.image_processor import ImageProcessor
+from services.image_lifecycle import ImageLifecycleService
+from services.library_stats import LibraryStatsService
+from services.upload_sessions import UploadSessionService, UploadSessionError
+from services.image_metadata import with_capture_fallback
+from services.tag_stats import TagStatsService
+from services.tag_prefilter import TagPrefilter, CachedPrefilter
 
 load_dotenv()
 
@@ -33,32 +46,284 @@ REGION = os.getenv('AWS_REGION')
 USER_ID = os.getenv('TEST_USER_ID')
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
 
+# Thresholds applied to the cached Rekognition response when deriving an image's tags
+TAG_MAX_LABELS = int(os.getenv('TAG_MAX_LABELS', '10'))
+TAG_MIN_CONFIDENCE = float(os.getenv('TAG_MIN_CONFIDENCE', '75'))
+REKOGNITION_MAX_RPS = float(os.getenv('REKOGNITION_MAX_RPS', '5'))
+# Bytes fetched from the start of an object when only its EXIF headers are needed
+METADATA_HEADER_BYTES = 256 * 1024
+# Candidate tags (lexical matches, then most frequent) offered to Claude per query or category
+TAG_PROMPT_LIMIT = int(os.getenv('TAG_PROMPT_LIMIT', '50'))
+VOCABULARY_CACHE_TTL = float(os.getenv('VOCABULARY_CACHE_TTL', '300'))
+
 # Initialize AWS DynamoDB client (will need AWS credentials configured)
 dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
 images_table = dynamodb.Table('images')
 tags_table = dynamodb.Table('tags')
 users_table = dynamodb.Table('users')
 tabs_table = dynamodb.Table('tabs')
+tab_images_table = dynamodb.Table('tab_images')
+upload_sessions_table = dynamodb.Table('upload_sessions')
+deletions_table = dynamodb.Table('deletions')
+label_cache_table = dynamodb.Table('label_cache')
 s3 = boto3.client("s3", region_name='us-east-1')
 
 # Image recognition
 rekognition = boto3.client('rekognition')
+tag_stats = TagStatsService(tags_table, images_table)
+image_index = ImageIndexService(images_table)
+library_stats = LibraryStatsService(users_table, images_table)
+image_processor = ImageProcessor(ANTHROPIC_API_KEY)
+upload_sessions = UploadSessionService(upload_sessions_table, s3, S3_BUCKET, app.config['MAX_CONTENT_LENGTH'])
+lifecycle = ImageLifecycleService(dynamodb, images_table, tabs_table, tab_images_table, tag_stats, library_stats,
+                                  deletions_table, s3, S3_BUCKET)
+label_cache = LabelCacheService(label_cache_table, rekognition, s3, RateLimiter(REKOGNITION_MAX_RPS))
+# Fail at startup rather than quietly truncating every upload's tags
+label_cache.check_thresholds(TAG_MAX_LABELS, TAG_MIN_CONFIDENCE)
 # labels_table = dynamodb.Table('photo_labels')
 
 # Initialize Anthropic client (will need API key)
 # anthropic_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
 
+# Background work (tab materialization etc.) runs off the request thread
+jobs = JobManager()
+
+def normalize_image_item(item):
+    """Convert DynamoDB Decimals in an image item into JSON-friendly numbers"""
+    if "tags" in item:
+        for tag in item["tags"]:
+            if "confidence" in tag:
+                tag["confidence"] = float(tag["confidence"])
+    for key in ("gpsLat", "gpsLon"):
+        if key in item:
+            item[key] = float(item[key])
+    for key in ("width", "height", "fileSize", "captureYear"):
+        if key in item:
+            item[key] = int(item[key])
+    return item
+
+def capture_range(args):
+    """
+    (start, end) ISO 8601 bounds from ?year= or ?from=/?to= (dates or timestamps), or None.
+    captureTime is wall-clock time without a zone (see with_capture_fallback), so any UTC offset
+    in the bounds is dropped rather than converted.
+    Raises ValueError on malformed input or when start is after end.
+    """
+    year = args.get('year')
+    start, end = args.get('from'), args.get('to')
+    if year:
+        year = int(year)
+        return f"{year:04d}-01-01T00:00:00", f"{year:04d}-12-31T23:59:59"
+    if not start and not end:
+        return None
+    start = datetime.fromisoformat(start).replace(tzinfo=None).isoformat() if start else "0000-01-01T00:00:00"
+    if end:
+        parsed = datetime.fromisoformat(end).replace(tzinfo=None)
+        # A bare date means the whole day
+        end = parsed.isoformat() if 'T' in end else parsed.replace(hour=23, minute=59, second=59).isoformat()
+    else:
+        end = "9999-12-31T23:59:59"
+    if start > end:
+        raise ValueError('from must not be after to')
+    return start, end
+
+def backfill_metadata(job=None):
+    """Background job: add capture/location/dimension metadata to images uploaded before it existed"""
+    stats = {'updated': 0, 'errors': 0}
+    kwargs = {'FilterExpression': Attr('captureYear').not_exists()}
+    while True:
+        response = images_table.scan(**kwargs)
+        for image in response.get('Items', []):
+            key = image.get('s3Key') or f"{image['id']}_{image.get('filename', '')}"
+            try:
+                # EXIF lives in the first segments of the file; fetch only the header bytes
+                header = s3.get_object(Bucket=S3_BUCKET, Key=key, Range=f"bytes=0-{METADATA_HEADER_BYTES - 1}")
+                try:
+                    metadata = image_processor.read_metadata(header['Body'].read())
+                except Exception:
+                    # Header larger than the range (e.g. big embedded previews): read the whole file
+                    metadata = image_processor.read_metadata(s3.get_object(Bucket=S3_BUCKET, Key=key)['Body'].read())
+                metadata = with_capture_fallback(metadata, float(image.get('dateModified', 0)))
+                names = {f"#{k}": k for k in metadata}
+                images_table.update_item(
+                    Key={'id': image['id']},
+                    UpdateExpression='SET ' + ', '.join(f"#{k} = :{k}" for k in metadata),
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues={f":{k}": v for k, v in metadata.items()}
+                )
+                stats['updated'] += 1
+            except Exception as e:
+                print(f"Error reading metadata for image {image['id']}: {e}")
+                stats['errors'] += 1
+            if job:
+                job.advance()
+        if 'LastEvaluatedKey' not in response:
+            return stats
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
 def get_all_images():
     response = images_table.scan()
     items = response.get('Items', [])
     for item in items:
-        if "tags" in item:
-            for tag in item["tags"]:
-                if "confidence" in tag:
-                    tag["confidence"] = float(tag["confidence"])
+        normalize_image_item(item)
     items.sort(key=lambda x: float(x.get("dateModified", 0)), reverse=True)
     return jsonify(items)
 
+def image_search_predicate(query, tags):
+    """Server-side version of the gallery filters: substring match on tag names, or tab-style tag matching"""
+    if tags:
+        return lambda item: match_tab_tag(tags, item.get('tags', [])) is not None
+    if query:
+        query = query.lower()
+        return lambda item: any(query in str(tag.get('name', '')).lower() for tag in item.get('tags', []))
+    return None
+
+def select_relevant_tags(subject, query, prefilter):
+    """
+    Pick the (up to 3) tags from a TagPrefilter's vocabulary most relevant to query.
+
+    Candidate tags are shortlisted locally first so only TAG_PROMPT_LIMIT of them
+    reach the prompt, and Claude is skipped entirely when the query names a tag.
+    Returns (results, usage). Raises ValueError if the model does not return valid JSON.
+    """
+    usage = {
+        'vocabulary_size': len(prefilter.vocabulary),
+        'candidate_tags': 0,
+        'llm_called': False,
+        'input_tokens': 0,
+        'output_tokens': 0,
+    }
+
+    if not prefilter.vocabulary:
+        return [], usage
+
+    exact = prefilter.exact_matches(query)
+    if exact:
+        print(f"Lexical match for {query!r}, skipping LLM: {exact}")
+        return [{'tag': tag, 'confidence': 100} for tag in exact[:3]], usage
+
+    candidates = prefilter.shortlist(query, TAG_PROMPT_LIMIT)
+    usage['candidate_tags'] = len(candidates)
+    tags_string = ','.join(candidates)
+
+    prompt = f"""Please analyze {subject}and select the top 3 most relevant tags from this list: [{tags_string}]
+Return ONLY a JSON array (no outer object) with the top matches in order of confidence. Use this exact format:
+
+[
+{{"tag": "tag_name", "confidence": 95}},
+{{"tag": "tag_name", "confidence": 87}},
+{{"tag": "tag_name", "confidence": 72}}
+]
+
+Rules:
+- Return maximum 3 tags, fewer if less than 3 are relevant
+- Confidence values: 0-100 (integers only)
+- Order by confidence (highest first)
+- Return empty array [] if no tags match"""
+
+    print("=======")
+    print("Prompt: ", prompt)
+    print("=======")
+    max_retries = 2
+    for attempt in range(max_retries):
+        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        response = client.messages.create(
+            model="claude-3-haiku-20240307",
+            max_tokens=512,
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+        print(response)
+        usage['llm_called'] = True
+        usage['input_tokens'] += response.usage.input_tokens
+        usage['output_tokens'] += response.usage.output_tokens
+
+        llm_response = response.content[0].text.strip()
+
+        print("=======")
+        print("LLM Response: ", llm_response)
+        print("Usage: ", usage)
+        print("=======")
+
+        try:
+            return json.loads(llm_response), usage
+        except json.JSONDecodeError:
+            # Continue to next attempt
+            continue
+
+    raise ValueError('Query is not working, please try a different query')
+
+def select_category_tags(category, vocabulary):
+    """Tag selector used for tab views: the relevant tags for a category name"""
+    results, _ = select_relevant_tags(f'the category "{category}" ', category, TagPrefilter(vocabulary))
+    return results
+
+def get_ranked_vocabulary():
+    """Every tag name, most frequent first"""
+    return [tag['name'] for tag in tag_stats.top_tags()]
+
+# The library vocabulary and its trigram index, shared across requests
+ranked_prefilter = CachedPrefilter(get_ranked_vocabulary, VOCABULARY_CACHE_TTL)
+
+tab_views = TabViewService(images_table, tabs_table, tab_images_table, select_category_tags)
+
+def schedule_tab_materialization(tab):
+    """Mark a tab's view as pending and rebuild it in the background"""
+    tab_views.mark_pending(tab)
+    return jobs.submit('materialize_tab', tab_views.materialize_tab, tab)
+
+def get_tag_thresholds():
+    """
+    (max_labels, min_confidence) for new uploads: the values of the last relabel,
+    stored on the users item, or the environment defaults
+    """
+    item = users_table.get_item(
+        Key={'user_id': USER_ID},
+        ProjectionExpression='tag_max_labels, tag_min_confidence'
+    ).get('Item', {})
+    return (int(item.get('tag_max_labels', TAG_MAX_LABELS)),
+            float(item.get('tag_min_confidence', TAG_MIN_CONFIDENCE)))
+
+def save_tag_thresholds(max_labels, min_confidence):
+    users_table.update_item(
+        Key={'user_id': USER_ID},
+        UpdateExpression='SET tag_max_labels = :max_labels, tag_min_confidence = :min_confidence',
+        ExpressionAttributeValues={
+            ':max_labels': max_labels,
+            ':min_confidence': Decimal(str(min_confidence)),
+        }
+    )
+
+def record_tag_stats(tags, job=None):
+    """
+    Background job: count an upload's tags. A tag seen for the first time may belong in a tab's
+    tag set, so built tabs recompute theirs (tabs still building pick it up from their scan).
+    """
+    new_tags = tag_stats.record_image(tags)
+    if new_tags:
+        ranked_prefilter.invalidate()
+        for tab in tab_views.built_tabs():
+            if tab.get('tab_name') != 'All Photos':
+                schedule_tab_materialization(tab)
+    return {'new_tags': new_tags}
+
+def rebuild_tag_stats(job=None):
+    """Background job: rebuild tag statistics, then drop the cached vocabulary"""
+    stats = tag_stats.rebuild(job=job)
+    ranked_prefilter.invalidate()
+    return stats
+
+def relabel_library(max_labels, min_confidence, job=None):
+    """Background job: re-derive every image's tags, then rebuild tab views on the new tags"""
+    stats = label_cache.relabel_library(images_table, S3_BUCKET, max_labels, min_confidence, job=job,
+                                        total=library_stats.image_count(USER_ID))
+    stats['tag_stats'] = tag_stats.rebuild()
+    ranked_prefilter.invalidate()
+    for tab in tabs_table.scan().get('Items', []):
+        if tab.get('tab_name') != 'All Photos':
+            schedule_tab_materialization(tab)
+    return stats
+
 @app.route('/', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -68,10 +333,148 @@ def health_check():
         'version': '1.0.0'
     })
 
+def ingest_image(image_id, filename, s3_key, data):
+    """
+    Label and index an image whose original is already in S3: store a thumbnail,
+    derive tags (reusing cached Rekognition results), write the images item and
+    update tag statistics and tab views.
+    """
+    # Hash the content so identical images reuse cached Rekognition results
+    digest = content_hash(data)
+    file_url = f"https://{S3_BUCKET}.s3.{REGION}.amazonaws.com/{s3_key}"
+    uploaded_at = time.time()
+
+    # One Pillow pass: EXIF/dimensions from the headers, then a small rendition for gallery tiles
+    metadata, thumbnail = image_processor.analyze_image_bytes(data)
+    thumbnail_key = f"thumbnails/{image_id}.jpg"
+    s3.put_object(
+        Bucket=S3_BUCKET,
+        Key=thumbnail_key,
+        Body=thumbnail,
+        ContentType="image/jpeg"
+    )
+    thumbnail_url = f"https://{S3_BUCKET}.s3.{REGION}.amazonaws.com/{thumbnail_key}"
+
+    # Run Rekognition (or reuse the cached raw response): generate tags
+    response = label_cache.detect_labels(S3_BUCKET, s3_key, digest)
+
+    # Store tag and confidence info
+    # Same thresholds as the rest of the library (the last relabel's, if any)
+    tags = derive_tags(response, *get_tag_thresholds())
+
+    new_item = {
+        "id": image_id,
+        "s3Url": file_url,
+        "s3Key": s3_key,
+        "thumbnailUrl": thumbnail_url,
+        "contentHash": digest,
+        "tags": tags,
+        "userId": USER_ID,
+        "dateModified": str(uploaded_at),
+        "filename": filename,
+        "fileSize": len(data),
+    }
+    new_item.update(with_capture_fallback(metadata, uploaded_at))
+
+    previous = images_table.put_item(
+        Item=new_item,
+        ReturnValues='ALL_OLD'
+    )
+    # A retried ingest overwrites its own item; only count genuinely new images.
+    # Tab views need no guard: add_image only counts rows it actually creates
+    if 'Attributes' not in previous:
+        library_stats.adjust_image_count(USER_ID, 1)
+        jobs.submit('tag_stats', record_tag_stats, tags)
+    jobs.submit('tab_add_image', tab_views.add_image, new_item)
+
+    return new_item
+
+def upload_date(item):
+    """dateModified is a stringified epoch timestamp; render it as ISO 8601"""
+    try:
+        return datetime.utcfromtimestamp(float(item['dateModified'])).isoformat()
+    except (KeyError, ValueError):
+        return item.get('dateModified')
+
+def gallery_tile(item):
+    """Gallery response shape for a projected images item"""
+    return {
+        'image_id': item['id'],
+        'filename': item.get('filename'),
+        'labels': [tag['name'] for tag in item.get('tags', [])],
+        'thumbnail_url': item.get('thumbnailUrl') or item['s3Url'],
+        'upload_date': upload_date(item),
+        'capture_time': item.get('captureTime'),
+    }
+
+def image_details(item):
+    """Detail response shape for a full images item"""
+    details = gallery_tile(item)
+    camera = ' '.join(filter(None, (item.get('cameraMake'), item.get('cameraModel'))))
+    details.update({
+        'url': item['s3Url'],
+        'tags': item.get('tags', []),
+        'detailed_description': item.get('description'),
+        'file_size': item.get('fileSize'),
+        'dimensions': f"{item['width']}x{item['height']}" if 'width' in item and 'height' in item else None,
+        'format': item.get('format'),
+        'camera': camera or None,
+        'location': {'lat': item['gpsLat'], 'lon': item['gpsLon']} if 'gpsLat' in item else None,
+    })
+    return details
+
+def describe_image(item):
+    """
+    Claude description of an image, stored on its item so it is only generated once.
+    Sends the thumbnail (far fewer image tokens than the original) when there is one.
+    Callers check that Claude is configured first, so no S3 read is wasted without it.
+    """
+    if item.get('thumbnailUrl'):
+        key, media_type = f"thumbnails/{item['id']}.jpg", 'image/jpeg'
+    else:
+        key = item.get('s3Key') or f"{item['id']}_{item.get('filename', '')}"
+        media_type = Image.MIME.get(item.get('format', '').upper(), 'image/jpeg')
+    data = s3.get_object(Bucket=S3_BUCKET, Key=key)['Body'].read()
+
+    description = image_processor.describe_image_bytes(data, media_type)
+    if not description:
+        return None
+
+    # if_not_exists: when two requests race, both return the description that was stored first
+    try:
+        response = images_table.update_item(
+            Key={'id': item['id']},
+            UpdateExpression='SET description = if_not_exists(description, :description)',
+            ConditionExpression=Attr('id').exists(),
+            ExpressionAttributeValues={':description': description},
+            ReturnValues='UPDATED_NEW'
+        )
+    except ClientError as e:
+        # Deleted while Claude was running; don't recreate the item just to cache this
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return description
+        raise
+    return response['Attributes']['description']
+
+def ingest_uploaded_object(session, job=None):
+    """
+    Background job: read a directly uploaded object back from S3 and ingest it.
+    A failure marks the session `failed` so the next callback or S3 event retries it.
+    """
+    try:
+        obj = s3.get_object(Bucket=S3_BUCKET, Key=session['s3_key'])
+        item = ingest_image(session['session_id'], session['filename'], session['s3_key'], obj['Body'].read())
+    except Exception as e:
+        upload_sessions.mark_failed(session['session_id'], str(e))
+        raise
+    upload_sessions.mark_completed(session['session_id'])
+    return {'image_id': item['id']}
+
 @app.route('/api/upload', methods=['POST'])
 def upload_image():
     """
-    Upload an image and process it through Omniparser and Claude for labeling
+    Upload an image through the backend and process it for labeling.
+    Prefer /api/uploads, which sends the bytes straight to S3.
     """
     try:
         if 'image' not in request.files:
@@ -83,53 +486,196 @@ def upload_image():
         
         # Generate unique image ID
         image_id = str(uuid.uuid4())
-        
+        data = file.read()
+
         # Save the uploaded file
         filename = f"{image_id}_{file.filename}"
         s3.upload_fileobj(
-            file,
+            io.BytesIO(data),
             S3_BUCKET,
             filename,
             ExtraArgs={"ContentType": file.content_type}
         )
-        file_url = f"https://{S3_BUCKET}.s3.{REGION}.amazonaws.com/{filename}"
-
-        # Run Rekognition: generate tags
-        response = rekognition.detect_labels(
-            Image={"S3Object": {"Bucket": S3_BUCKET, "Name": filename}},
-            MaxLabels=10,
-            MinConfidence=75
-        )
-
-        # Store tag and confidence info
-        tags = [{'name': label['Name'], 'confidence': Decimal(str(label['Confidence']))} for label in response['Labels']]
 
-        new_item = {
-            "id": image_id,
-            "s3Url": file_url,
-            "tags": tags,
-            "userId": USER_ID,
-            "dateModified": str(time.time()),
-            "filename": file.filename,
-        }
-
-        images_table.put_item(
-            Item=new_item
-        )
+        new_item = ingest_image(image_id, file.filename, filename, data)
         
         return jsonify(new_item)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/uploads', methods=['POST'])
+def create_upload_session():
+    """
+    Start a direct-to-S3 upload. Body: {"filename", "content_type", "size"}.
+    Returns a presigned PUT url, or presigned part urls for a multipart upload.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            session = upload_sessions.create(
+                USER_ID,
+                os.path.basename(str(data.get('filename', ''))),
+                data.get('content_type', ''),
+                int(data.get('size', 0))
+            )
+        except (TypeError, ValueError):
+            return jsonify({'error': 'size must be an integer'}), 400
+        except UploadSessionError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify(dict(session, success=True))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<session_id>', methods=['GET'])
+def get_upload_session(session_id):
+    """
+    Ingest status of an upload session: pending, ingesting, completed or failed.
+    Read from upload_sessions, so any worker can answer (unlike /api/jobs).
+    """
+    try:
+        session = upload_sessions.get(session_id)
+        if not session:
+            return jsonify({'error': 'Unknown upload session'}), 404
+
+        return jsonify({
+            'success': True,
+            'image_id': session['session_id'],
+            'status': session['status'],
+            'error': session.get('error')
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<session_id>/complete', methods=['POST'])
+def complete_upload_session(session_id):
+    """
+    Completion callback from the client once the bytes are in S3.
+    Body for multipart uploads: {"parts": [{"part_number": 1, "etag": "..."}]}.
+    Labeling and indexing run in a background job.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            session = upload_sessions.complete(session_id, data.get('parts'))
+        except UploadSessionError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if session is None:
+            # Already ingested, or being ingested after an earlier callback or an S3 event
+            return jsonify({'success': True, 'image_id': session_id, 'job_id': None})
+
+        job = jobs.submit('ingest_upload', ingest_uploaded_object, session)
+        return jsonify({
+            'success': True,
+            'image_id': session_id,
+            'job_id': job.job_id
+        }), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/s3-event', methods=['POST'])
+def s3_upload_event():
+    """
+    Stand-in for an S3 ObjectCreated notification (same JSON shape as the S3 event),
+    so uploads get ingested even if the client never calls back.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        job_ids = []
+        for record in data.get('Records', []):
+            key = unquote_plus(record.get('s3', {}).get('object', {}).get('key', ''))
+            try:
+                session = upload_sessions.claim_from_event(key)
+            except UploadSessionError as e:
+                print(f"Ignoring S3 event for {key}: {e}")
+                continue
+            if session:
+                job_ids.append(jobs.submit('ingest_upload', ingest_uploaded_object, session).job_id)
+
+        return jsonify({
+            'success': True,
+            'job_ids': job_ids
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/relabel', methods=['POST'])
+def relabel_images():
+    """
+    Re-derive tags for the whole library with new thresholds, reusing cached
+    Rekognition responses and only calling Rekognition for cache misses.
+    The thresholds are saved and apply to every later upload.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        current_max_labels, current_min_confidence = get_tag_thresholds()
+        max_labels = int(data.get('max_labels', current_max_labels))
+        min_confidence = float(data.get('min_confidence', current_min_confidence))
+
+        try:
+            label_cache.check_thresholds(max_labels, min_confidence)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Saved before the job starts, so uploads during and after the relabel use the new thresholds too
+        save_tag_thresholds(max_labels, min_confidence)
+        job = jobs.submit('relabel', relabel_library, max_labels, min_confidence)
+
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id
+        })
+
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_labels and min_confidence must be numbers'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/search', methods=['GET'])
 def search_images():
     """
-    Search images based on natural language query
+    Search images based on natural language query.
+
+    Without paging parameters returns the whole library as a list (legacy).
+    With ?limit= (and ?cursor= from a previous page) returns one newest-first page,
+    optionally filtered by ?query= (tag substring) or ?tags= (comma-separated tag set).
+    ?year= or ?from=/?to= page through the capture-time index instead, and ?near=
+    (a geohash prefix) through the location index.
     """
     try:
-        return get_all_images()
+        paging_args = ('limit', 'cursor', 'year', 'from', 'to', 'near')
+        if not any(arg in request.args for arg in paging_args):
+            return get_all_images()
+
+        try:
+            start_key = decode_cursor(request.args.get('cursor'))
+            date_range = capture_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        tags = [t.strip().lower() for t in request.args.get('tags', '').split(',') if t.strip()]
+        predicate = image_search_predicate(request.args.get('query', '').strip(), tags)
+        limit = parse_limit(request.args.get('limit'))
+        near = request.args.get('near', '').strip().lower()
+
+        if date_range:
+            page = image_index.page_by_capture_time(USER_ID, date_range[0], date_range[1], limit, start_key, predicate)
+        elif near:
+            page = image_index.page_by_geohash(USER_ID, near, limit, start_key, predicate)
+        else:
+            page = image_index.page(USER_ID, limit, start_key, predicate)
 
+        return jsonify({
+            'success': True,
+            'images': [normalize_image_item(item) for item in page['items']],
+            'next_cursor': encode_cursor(page['last_evaluated_key'])
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -138,156 +684,230 @@ def search_images():
 def deep_search_api():
     query = request.args.get("query")
     try:
-        response = tags_table.scan()
-        print("=======")
-        print("tags: ", response)
-        print("=======")
-        all_tags = set()
-        
-        for item in response.get('Items', []):
-            all_tags.add(item['name'])
-        
-        tags_string = ','.join(sorted(all_tags))
-        
-        prompt = f"""Please analyze the user query:
-"{query}" 
-and select the top 3 most relevant tags from this list: [{tags_string}]
-Return ONLY a JSON array (no outer object) with the top matches in order of confidence. Use this exact format:
+        try:
+            results, usage = select_relevant_tags(f'the user query:\n"{query}" \n', query or '', ranked_prefilter.get())
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'query': query
+            }), 400
 
-[
-{{"tag": "tag_name", "confidence": 95}},
-{{"tag": "tag_name", "confidence": 87}},
-{{"tag": "tag_name", "confidence": 72}}
-]
+        return jsonify({
+            'success': True,
+            'results': json.dumps(results),
+            'usage': usage
+        })
+                
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-Rules:
-- Return maximum 3 tags, fewer if less than 3 are relevant
-- Confidence values: 0-100 (integers only)
-- Order by confidence (highest first)
-- Return empty array [] if no tags match"""
+@app.route('/api/metadata/backfill', methods=['POST'])
+def backfill_image_metadata():
+    """
+    Extract EXIF/dimension metadata for images that predate metadata extraction
+    """
+    try:
+        job = jobs.submit('metadata_backfill', backfill_metadata)
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id
+        })
 
-        print("=======")
-        print("Prompt: ", prompt)
-        print("=======")
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-                response = client.messages.create(
-                    model="claude-3-haiku-20240307",
-                    max_tokens=512,
-                    messages=[{"role": "user", "content": prompt}]
-                )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tags', methods=['GET'])
+def get_tags():
+    """
+    Get the tag vocabulary ranked by how many images carry each tag
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'tags': tag_stats.top_tags(parse_limit(request.args.get('limit'), default=100, maximum=1000))
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tags/rebuild', methods=['POST'])
+def rebuild_tags():
+    """
+    Rebuild tag statistics from images_table with a parallel scan (repair job)
+    """
+    try:
+        job = jobs.submit('tag_stats_rebuild', rebuild_tag_stats)
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id
+        })
 
-                print(response)
-                
-                llm_response = response.content[0].text.strip()
-                
-                print("=======")
-                print("LLM Response: ", llm_response)
-                print("=======")
-                
-                
-                return jsonify({
-                    'success': True,
-                    'results': llm_response
-                })
-                
-            except json.JSONDecodeError as json_err:
-                if attempt == max_retries - 1:  # Last attempt failed
-                    return jsonify({
-                        'success': False,
-                        'error': 'Query is not working, please try a different query',
-                        'category': category
-                    }), 400
-                # Continue to next attempt
-                continue
-                
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/image/<image_id>', methods=['GET'])
 def get_image_details(image_id):
     """
-    Get detailed information about a specific image
+    Get detailed information about a specific image with a single GetItem.
+    ?describe=true also returns a Claude description, generated from the thumbnail
+    on first request and stored on the item for every later one.
     """
     try:
-        # TODO: Query DynamoDB for image labels and metadata
-        # TODO: Use Claude to generate detailed description of the image
-        
-        # For now, return mock response
-        mock_details = {
-            'image_id': image_id,
-            'filename': f'{image_id}_sample.jpg',
-            'labels': ['nature', 'outdoor', 'landscape', 'mountain', 'sky'],
-            'detailed_description': 'A beautiful landscape photograph showing mountains in the background with a clear blue sky. The image captures the natural beauty of the outdoors with excellent lighting and composition.',
-            'upload_date': datetime.now().isoformat(),
-            'file_size': '2.5MB',
-            'dimensions': '1920x1080'
-        }
-        
+        item = images_table.get_item(Key={'id': image_id}).get('Item')
+        if not item:
+            return jsonify({'error': 'Image not found'}), 404
+
+        if request.args.get('describe', '').lower() in ('1', 'true') and not item.get('description') \
+                and image_processor.anthropic_client:
+            try:
+                item['description'] = describe_image(item)
+            except Exception as e:
+                # The stored details are still worth returning; the next open tries again
+                print(f"Error describing image {image_id}: {e}")
+
         return jsonify({
             'success': True,
-            'image_details': mock_details
+            'image_details': image_details(normalize_image_item(item))
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/image/<image_id>', methods=['DELETE'])
+def delete_image(image_id):
+    """
+    Delete one image, its S3 objects, tab view rows and tag counts
+    """
+    try:
+        result = lifecycle.delete_images([image_id])
+        if result['deleted'] == 0:
+            return jsonify({'error': 'Image not found'}), 404
+
+        return jsonify({
+            'success': True,
+            'result': result
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/images/delete', methods=['POST'])
+def bulk_delete_images():
+    """
+    Delete many images in a background job.
+    Body: {"image_ids": [...]} or {"tab_id": "..."} to clear everything in a tab's view.
+    Retrying with the same ids is safe; already deleted images are skipped.
+    Poll /api/images/delete/<deletion_id> for progress.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        image_ids = data.get('image_ids')
+        tab_id = data.get('tab_id')
+
+        if image_ids is None and not tab_id:
+            return jsonify({'error': 'image_ids or tab_id is required'}), 400
+        if image_ids is not None and not isinstance(image_ids, list):
+            return jsonify({'error': 'image_ids must be a list'}), 400
+
+        if tab_id:
+            image_ids = (image_ids or []) + lifecycle.tab_image_ids(tab_id)
+
+        deletion_id = lifecycle.start_deletion(len(set(image_ids)))
+        job = jobs.submit('bulk_delete', lifecycle.delete_images, image_ids, deletion_id=deletion_id)
+
+        return jsonify({
+            'success': True,
+            'deletion_id': deletion_id,
+            'job_id': job.job_id,
+            'requested': len(set(image_ids))
+        }), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/images/delete/<deletion_id>', methods=['GET'])
+def get_bulk_delete(deletion_id):
+    """
+    Progress of a bulk deletion. Read from the deletions table, so any worker can answer (unlike /api/jobs).
+    """
+    try:
+        deletion = lifecycle.get_deletion(deletion_id)
+        if not deletion:
+            return jsonify({'error': 'Deletion not found'}), 404
+
+        return jsonify({
+            'success': True,
+            'deletion': {
+                'deletion_id': deletion['deletion_id'],
+                'status': deletion['status'],
+                'requested': int(deletion['requested']),
+                'progress': int(deletion['progress']),
+                'result': {k: int(v) for k, v in deletion.get('result', {}).items()},
+                'error': deletion.get('error'),
+            }
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/gallery', methods=['GET'])
 def get_gallery():
     """
-    Get all images in the gallery
+    Get one page of the gallery, newest first: ?limit= and ?cursor= from a previous page.
+    total_count comes from the maintained per-user counter, not from counting items.
     """
     try:
-        # TODO: Query DynamoDB for all images
-        # TODO: Return paginated results
-        
-        # For now, return mock gallery
-        mock_gallery = [
-            {
-                'image_id': 'gallery-1',
-                'filename': 'nature1.jpg',
-                'labels': ['nature', 'forest', 'green'],
-                'thumbnail_url': '/api/thumbnail/gallery-1',
-                'upload_date': datetime.now().isoformat()
-            },
-            {
-                'image_id': 'gallery-2',
-                'filename': 'city1.jpg', 
-                'labels': ['city', 'urban', 'night'],
-                'thumbnail_url': '/api/thumbnail/gallery-2',
-                'upload_date': datetime.now().isoformat()
-            },
-            {
-                'image_id': 'gallery-3',
-                'filename': 'portrait1.jpg',
-                'labels': ['person', 'portrait', 'indoor'],
-                'thumbnail_url': '/api/thumbnail/gallery-3',
-                'upload_date': datetime.now().isoformat()
-            }
-        ]
-        
+        try:
+            start_key = decode_cursor(request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        page = image_index.page(USER_ID, parse_limit(request.args.get('limit')), start_key)
+
         return jsonify({
             'success': True,
-            'images': mock_gallery,
-            'total_count': len(mock_gallery)
+            'images': [gallery_tile(normalize_image_item(item)) for item in page['items']],
+            'next_cursor': encode_cursor(page['last_evaluated_key']),
+            'total_count': library_stats.image_count(USER_ID)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/gallery/recount', methods=['POST'])
+def recount_gallery():
+    """
+    Reset the gallery total from the images index (libraries that predate the counter, or drift)
+    """
+    try:
+        job = jobs.submit('gallery_recount', library_stats.recount, USER_ID)
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/thumbnail/<image_id>', methods=['GET'])
 def get_thumbnail(image_id):
     """
     Get thumbnail for a specific image
     """
     try:
-        # TODO: Generate or retrieve thumbnail from storage
-        # For now, return placeholder response
+        response = images_table.get_item(
+            Key={'id': image_id},
+            ProjectionExpression='s3Url, thumbnailUrl'
+        )
+        item = response.get('Item')
+        if not item:
+            return jsonify({'error': 'Image not found'}), 404
+
+        # Images uploaded before renditions existed fall back to the original
         return jsonify({
             'success': True,
-            'thumbnail_url': f'/uploads/thumbnails/{image_id}_thumb.jpg'
+            'thumbnail_url': item.get('thumbnailUrl') or item['s3Url']
         })
         
     except Exception as e:
@@ -297,70 +917,21 @@ def get_thumbnail(image_id):
 @app.route('/api/category/<category>', methods=['GET'])
 def category(category):
     try:
-        response = tags_table.scan()
-        print("=======")
-        print("tags: ", response)
-        print("=======")
-        all_tags = set()
+        try:
+            parsed_results, usage = select_relevant_tags(f'the category "{category}" ', category, ranked_prefilter.get())
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'category': category
+            }), 400
         
-        for item in response.get('Items', []):
-            all_tags.add(item['name'])
-        
-        tags_string = ','.join(sorted(all_tags))
-        
-        prompt = f"""Please analyze the category "{category}" and select the top 3 most relevant tags from this list: [{tags_string}]
-Return ONLY a JSON array (no outer object) with the top matches in order of confidence. Use this exact format:
-
-[
-{{"tag": "tag_name", "confidence": 95}},
-{{"tag": "tag_name", "confidence": 87}},
-{{"tag": "tag_name", "confidence": 72}}
-]
-
-Rules:
-- Return maximum 3 tags, fewer if less than 3 are relevant
-- Confidence values: 0-100 (integers only)
-- Order by confidence (highest first)
-- Return empty array [] if no tags match"""
-
-        print("=======")
-        print("Prompt: ", prompt)
-        print("=======")
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-                response = client.messages.create(
-                    model="claude-3-haiku-20240307",
-                    max_tokens=512,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-
-                print(response)
-                
-                llm_response = response.content[0].text.strip()
-                
-                print("=======")
-                print("LLM Response: ", llm_response)
-                print("=======")
-                
-                parsed_results = json.loads(llm_response)
-                
-                return jsonify({
-                    'success': True,
-                    'category': category,
-                    'results': parsed_results
-                })
-                
-            except json.JSONDecodeError as json_err:
-                if attempt == max_retries - 1:  # Last attempt failed
-                    return jsonify({
-                        'success': False,
-                        'error': 'Query is not working, please try a different query',
-                        'category': category
-                    }), 400
-                # Continue to next attempt
-                continue
+        return jsonify({
+            'success': True,
+            'category': category,
+            'results': parsed_results,
+            'usage': usage
+        })
                 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -396,6 +967,7 @@ def get_tabs():
             # Insert default tabs into database
             for tab in default_tabs:
                 tabs_table.put_item(Item=tab)
+                schedule_tab_materialization(tab)
                 tabs.append(tab)
         
         # Sort tabs to ensure "All Photos" is always first
@@ -431,15 +1003,91 @@ def add_tab():
         }
         
         tabs_table.put_item(Item=new_tab)
+        job = schedule_tab_materialization(new_tab)
         
         return jsonify({
             'success': True,
-            'tab': new_tab
+            'tab': dict(new_tab, view_status='pending'),
+            'job_id': job.job_id
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tabs/<tab_id>/images', methods=['GET'])
+def get_tab_images(tab_id):
+    """
+    Get one page of a tab's precomputed images (newest first)
+    """
+    try:
+        tab = tab_views.get_tab(USER_ID, tab_id)
+        if not tab:
+            return jsonify({'error': 'Tab not found'}), 404
+
+        # Tabs created before views existed, failed builds and builds whose job was lost
+        # get (re)materialized on open
+        status = tab.get('view_status')
+        if tab_views.needs_materialization(tab):
+            schedule_tab_materialization(tab)
+            status = 'pending'
+        if status != 'ready':
+            return jsonify({
+                'success': True,
+                'status': status,
+                'images': [],
+                'next_cursor': None
+            })
+
+        try:
+            start_key = decode_cursor(request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        page = tab_views.get_page(tab_id, parse_limit(request.args.get('limit')), start_key)
+        return jsonify({
+            'success': True,
+            'status': status,
+            'tags': tab.get('view_tags', []),
+            'total_count': int(tab.get('image_count', 0)),
+            'images': [normalize_image_item(item) for item in page['items']],
+            'next_cursor': encode_cursor(page['last_evaluated_key'])
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tabs/<tab_id>/refresh', methods=['POST'])
+def refresh_tab(tab_id):
+    """
+    Recompute a tab's materialized view in the background
+    """
+    try:
+        tab = tab_views.get_tab(USER_ID, tab_id)
+        if not tab:
+            return jsonify({'error': 'Tab not found'}), 404
+
+        job = schedule_tab_materialization(tab)
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get status and progress of a background job
+    """
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
 @app.route('/api/llm/<query>', methods=['GET'])
 def llm(query):
     try:
@@ -214,25 +214,33 @@ class DatabaseService:
     
     def delete_image(self, image_id: str) -> bool:
         """Delete all labels associated with an image"""
+        return self.delete_images([image_id])
+
+    def delete_images(self, image_ids: List[str]) -> bool:
+        """Delete all labels associated with the given images using batched writes"""
         if not self.table:
             return False
             
         try:
-            # Get all label items for this image
-            response = self.table.query(
-                IndexName='ImageIdIndex',
-                KeyConditionExpression='image_id = :image_id',
-                ExpressionAttributeValues={':image_id': image_id}
-            )
-            
-            # Delete each label item
-            for item in response['Items']:
-                self.table.delete_item(
-                    Key={'label_id': item['label_id']}
-                )
+            with self.table.batch_writer() as batch:
+                for image_id in image_ids:
+                    # Get all label items for this image (paginated)
+                    kwargs = {
+                        'IndexName': 'ImageIdIndex',
+                        'KeyConditionExpression': 'image_id = :image_id',
+                        'ExpressionAttributeValues': {':image_id': image_id},
+                        'ProjectionExpression': 'label_id'
+                    }
+                    while True:
+                        response = self.table.query(**kwargs)
+                        for item in response['Items']:
+                            batch.delete_item(Key={'label_id': item['label_id']})
+                        if 'LastEvaluatedKey' not in response:
+                            break
+                        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
             
             return True
             
         except ClientError as e:
-            print(f"Error deleting image: {e}")
+            print(f"Error deleting images: {e}")
             return False
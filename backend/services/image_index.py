@@ -0,0 +1,73 @@
+from boto3.dynamodb.conditions import Key
+from typing import Any, Callable, Dict, Optional
+
+# GSIs on images_table, all partitioned by userId:
+#   UserDateIndex    - dateModified (stringified upload timestamp; string order matches time order)
+#   UserCaptureIndex - captureTime (ISO 8601 EXIF capture time, upload time as fallback)
+#   UserGeoIndex     - geohash (only images with GPS data; prefixes are bounding boxes)
+USER_DATE_INDEX = 'UserDateIndex'
+USER_CAPTURE_INDEX = 'UserCaptureIndex'
+USER_GEO_INDEX = 'UserGeoIndex'
+
+# Attributes a gallery tile needs; everything else stays out of list responses
+TILE_ATTRIBUTES = ('id', 's3Url', 'thumbnailUrl', 'filename', 'dateModified', 'captureTime', 'tags', 'userId')
+
+
+class ImageIndexService:
+    """Cursor-paginated, newest-first reads of a user's images"""
+
+    def __init__(self, images_table, max_reads_per_page: int = 10):
+        self.images_table = images_table
+        # Bounds how many underlying Query calls one filtered page may cost
+        self.max_reads_per_page = max_reads_per_page
+
+    def page(self, user_id: str, limit: int, start_key: Optional[Dict[str, Any]] = None,
+             predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """Read up to `limit` images, newest upload first"""
+        return self._query_page(USER_DATE_INDEX, Key('userId').eq(user_id), limit, start_key, predicate)
+
+    def page_by_capture_time(self, user_id: str, start: str, end: str, limit: int,
+                             start_key: Optional[Dict[str, Any]] = None,
+                             predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """Images captured between two ISO 8601 timestamps (inclusive), newest first"""
+        condition = Key('userId').eq(user_id) & Key('captureTime').between(start, end)
+        return self._query_page(USER_CAPTURE_INDEX, condition, limit, start_key, predicate)
+
+    def page_by_geohash(self, user_id: str, prefix: str, limit: int,
+                        start_key: Optional[Dict[str, Any]] = None,
+                        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """Images whose location falls in the geohash cell `prefix`"""
+        condition = Key('userId').eq(user_id) & Key('geohash').begins_with(prefix)
+        return self._query_page(USER_GEO_INDEX, condition, limit, start_key, predicate)
+
+    def _query_page(self, index_name: str, key_condition, limit: int,
+                    start_key: Optional[Dict[str, Any]] = None,
+                    predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """
+        With a predicate, keeps reading until the page is full, the index is exhausted or
+        max_reads_per_page is hit, so a page may come back short with a cursor still set.
+        """
+        kwargs = {
+            'IndexName': index_name,
+            'KeyConditionExpression': key_condition,
+            'ScanIndexForward': False,
+            'ProjectionExpression': ', '.join(f'#{a}' for a in TILE_ATTRIBUTES),
+            'ExpressionAttributeNames': {f'#{a}': a for a in TILE_ATTRIBUTES},
+        }
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+
+        items = []
+        last_key = None
+        for _ in range(self.max_reads_per_page):
+            # Never read past what the page can hold, so the cursor never skips items
+            kwargs['Limit'] = limit - len(items)
+            response = self.images_table.query(**kwargs)
+            batch = response.get('Items', [])
+            items.extend(batch if predicate is None else [item for item in batch if predicate(item)])
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key or len(items) >= limit:
+                break
+            kwargs['ExclusiveStartKey'] = last_key
+
+        return {'items': items, 'last_evaluated_key': last_key}
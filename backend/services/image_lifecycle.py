@@ -0,0 +1,201 @@
+import time
+import uuid
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from services.tab_views import image_sort_key, match_tab_tag
+
+# DynamoDB BatchGetItem and S3 DeleteObjects per-call limits
+BATCH_GET_LIMIT = 100
+S3_DELETE_LIMIT = 1000
+
+
+def _chunks(items: List[Any], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class ImageLifecycleService:
+    """Bulk deletion of images across S3, images_table, tab views, tag statistics and library counters"""
+
+    def __init__(self, dynamodb, images_table, tabs_table, tab_images_table, tag_stats, library_stats,
+                 deletions_table, s3_client, bucket: str, deletion_ttl: int = 7 * 24 * 3600):
+        self.dynamodb = dynamodb
+        # Bulk deletion progress lives here rather than in the per-process JobManager,
+        # so any worker can report it
+        self.deletions_table = deletions_table
+        self.deletion_ttl = deletion_ttl
+        self.images_table = images_table
+        self.tabs_table = tabs_table
+        self.tab_images_table = tab_images_table
+        self.tag_stats = tag_stats
+        self.library_stats = library_stats
+        self.s3 = s3_client
+        self.bucket = bucket
+
+    def start_deletion(self, requested: int) -> str:
+        """Create the progress record for a bulk deletion and return its id"""
+        deletion_id = str(uuid.uuid4())
+        self.deletions_table.put_item(Item={
+            'deletion_id': deletion_id,
+            'status': 'queued',
+            'requested': requested,
+            'progress': 0,
+            'expires_at': int(time.time()) + self.deletion_ttl,
+        })
+        return deletion_id
+
+    def get_deletion(self, deletion_id: str) -> Optional[Dict[str, Any]]:
+        return self.deletions_table.get_item(Key={'deletion_id': deletion_id}).get('Item')
+
+    def _record_deletion(self, deletion_id: str, **fields):
+        self.deletions_table.update_item(
+            Key={'deletion_id': deletion_id},
+            UpdateExpression='SET ' + ', '.join(f'#{k} = :{k}' for k in fields),
+            ExpressionAttributeNames={f'#{k}': k for k in fields},
+            ExpressionAttributeValues={f':{k}': v for k, v in fields.items()}
+        )
+
+    def tab_image_ids(self, tab_id: str) -> List[str]:
+        """Every image id in a tab's materialized view"""
+        ids = []
+        kwargs = {
+            'KeyConditionExpression': Key('tab_id').eq(tab_id),
+            'ProjectionExpression': 'id',
+        }
+        while True:
+            response = self.tab_images_table.query(**kwargs)
+            ids.extend(item['id'] for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return ids
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _get_images(self, image_ids: List[str]) -> List[Dict[str, Any]]:
+        table_name = self.images_table.name
+        fields = ('id', 's3Key', 'filename', 'thumbnailUrl', 'tags', 'dateModified', 'userId')
+        request = {table_name: {
+            'Keys': [{'id': image_id} for image_id in image_ids],
+            'ProjectionExpression': ', '.join(f'#{f}' for f in fields),
+            'ExpressionAttributeNames': {f'#{f}': f for f in fields},
+        }}
+        images = []
+        while request:
+            response = self.dynamodb.batch_get_item(RequestItems=request)
+            images.extend(response.get('Responses', {}).get(table_name, []))
+            # Unprocessed keys come back with the projection attached, ready to resubmit
+            request = response.get('UnprocessedKeys') or None
+        return images
+
+    @staticmethod
+    def _s3_keys(image: Dict[str, Any]) -> List[str]:
+        keys = [image.get('s3Key') or f"{image['id']}_{image.get('filename', '')}"]
+        if image.get('thumbnailUrl'):
+            keys.append(f"thumbnails/{image['id']}.jpg")
+        return keys
+
+    def _delete_s3_objects(self, keys: List[str]) -> int:
+        errors = 0
+        for chunk in _chunks(keys, S3_DELETE_LIMIT):
+            response = self.s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True}
+            )
+            for error in response.get('Errors', []):
+                print(f"Error deleting s3://{self.bucket}/{error.get('Key')}: {error.get('Message')}")
+                errors += 1
+        return errors
+
+    def _claim_for_deletion(self, image: Dict[str, Any]) -> bool:
+        """
+        Mark an image `deleting`. Only the call that sets the mark decrements its counters,
+        so a retry after a partial failure doesn't decrement them twice.
+        """
+        try:
+            self.images_table.update_item(
+                Key={'id': image['id']},
+                UpdateExpression='SET deleting = :now',
+                ConditionExpression='attribute_exists(id) AND attribute_not_exists(deleting)',
+                ExpressionAttributeValues={':now': int(time.time())}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+    def _remove_from_tab_views(self, images: List[Dict[str, Any]]):
+        tabs = self.tabs_table.scan(FilterExpression=Attr('view_status').exists()).get('Items', [])
+        for tab in tabs:
+            removed = 0
+            for image in images:
+                # Same rule that put the image into the view; only rows that actually existed count
+                if match_tab_tag(tab.get('view_tags', []), image.get('tags', [])):
+                    response = self.tab_images_table.delete_item(
+                        Key={'tab_id': tab['tab_id'], 'sort_key': image_sort_key(image)},
+                        ReturnValues='ALL_OLD'
+                    )
+                    if 'Attributes' in response:
+                        removed += 1
+            if removed:
+                self.tabs_table.update_item(
+                    Key={'user_id': tab['user_id'], 'tab_id': tab['tab_id']},
+                    UpdateExpression='ADD image_count :delta',
+                    ExpressionAttributeValues={':delta': -removed}
+                )
+
+    def delete_images(self, image_ids: List[str], job=None, deletion_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Delete images, recording progress and the outcome on the deletion record if one is given
+        """
+        if not deletion_id:
+            return self._delete_images(image_ids, job)
+        try:
+            stats = self._delete_images(image_ids, job, deletion_id)
+        except Exception as e:
+            self._record_deletion(deletion_id, status='failed', error=str(e)[:1000])
+            raise
+        self._record_deletion(deletion_id, status='completed', result=stats)
+        return stats
+
+    def _delete_images(self, image_ids: List[str], job=None, deletion_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Delete images with everything derived from them. Safe to retry: ids whose images_table
+        item is already gone are skipped, that item is deleted last in each chunk, tab counts only
+        move for rows that really existed, and tag/library counters only move for images this
+        call marked `deleting`.
+        """
+        image_ids = list(dict.fromkeys(image_ids))
+        stats = {'requested': len(image_ids), 'deleted': 0, 'missing': 0, 's3_errors': 0}
+        if job:
+            job.set_total(len(image_ids))
+
+        done = 0
+        for chunk in _chunks(image_ids, BATCH_GET_LIMIT):
+            images = self._get_images(chunk)
+            stats['missing'] += len(chunk) - len(images)
+
+            if images:
+                claimed = [image for image in images if self._claim_for_deletion(image)]
+                # Straight after the claim, so an S3 or tab failure below can't leave claimed counters undecremented
+                self.tag_stats.remove_images(claimed)
+                for user_id, count in Counter(image.get('userId') for image in claimed).items():
+                    self.library_stats.adjust_image_count(user_id, -count)
+                stats['s3_errors'] += self._delete_s3_objects(
+                    [key for image in images for key in self._s3_keys(image)]
+                )
+                self._remove_from_tab_views(images)
+                with self.images_table.batch_writer() as batch:
+                    for image in images:
+                        batch.delete_item(Key={'id': image['id']})
+                stats['deleted'] += len(images)
+
+            if job:
+                job.advance(len(chunk))
+            if deletion_id:
+                # One write per chunk of up to 100 images
+                self._record_deletion(deletion_id, status='running', progress=done + len(chunk))
+            done += len(chunk)
+
+        return stats
@@ -0,0 +1,108 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+# EXIF tag ids (see PIL.ExifTags.TAGS / GPSTAGS)
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+TAG_MAKE = 271
+TAG_MODEL = 272
+TAG_ORIENTATION = 274
+TAG_DATETIME = 306
+TAG_DATETIME_ORIGINAL = 36867
+GPS_LAT_REF, GPS_LAT, GPS_LON_REF, GPS_LON = 1, 2, 3, 4
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 7
+
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Standard geohash; nearby points share prefixes, so a prefix is a bounding-box query"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def parse_exif_datetime(value: Any) -> Optional[str]:
+    """'YYYY:MM:DD HH:MM:SS' -> ISO 8601, which sorts correctly as a string"""
+    try:
+        return datetime.strptime(str(value).strip('\x00 '), '%Y:%m:%d %H:%M:%S').isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def _gps_degrees(dms, ref) -> Optional[float]:
+    try:
+        degrees, minutes, seconds = (float(x) for x in dms)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    value = degrees + minutes / 60 + seconds / 3600
+    return -value if str(ref).upper() in ('S', 'W') else value
+
+
+def extract_metadata(img: Image.Image) -> Dict[str, Any]:
+    """
+    Typed metadata from an opened image's headers. Only reads what Image.open already
+    parsed (size, EXIF), so no pixel data is decoded.
+    """
+    width, height = img.size
+    metadata: Dict[str, Any] = {'format': img.format or ''}
+
+    exif = img.getexif()
+    # Orientations 5-8 are rotated by 90 degrees, so the displayed image is height x width
+    if exif.get(TAG_ORIENTATION) in (5, 6, 7, 8):
+        width, height = height, width
+    metadata['width'] = width
+    metadata['height'] = height
+
+    if exif.get(TAG_MAKE):
+        metadata['cameraMake'] = str(exif[TAG_MAKE]).strip('\x00 ')
+    if exif.get(TAG_MODEL):
+        metadata['cameraModel'] = str(exif[TAG_MODEL]).strip('\x00 ')
+
+    captured = parse_exif_datetime(exif.get_ifd(EXIF_IFD).get(TAG_DATETIME_ORIGINAL)) \
+        or parse_exif_datetime(exif.get(TAG_DATETIME))
+    if captured:
+        metadata['captureTime'] = captured
+        metadata['captureTimeSource'] = 'exif'
+
+    gps = exif.get_ifd(GPS_IFD)
+    if gps.get(GPS_LAT) and gps.get(GPS_LON):
+        lat = _gps_degrees(gps[GPS_LAT], gps.get(GPS_LAT_REF))
+        lon = _gps_degrees(gps[GPS_LON], gps.get(GPS_LON_REF))
+        if lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180:
+            metadata['gpsLat'] = Decimal(str(round(lat, 6)))
+            metadata['gpsLon'] = Decimal(str(round(lon, 6)))
+            metadata['geohash'] = geohash_encode(lat, lon)
+
+    return metadata
+
+
+def with_capture_fallback(metadata: Dict[str, Any], uploaded_at: float) -> Dict[str, Any]:
+    """
+    Images without an EXIF capture time are indexed by upload time so they still appear in date ranges.
+    EXIF DateTimeOriginal is the camera's local wall-clock time with no zone, while the fallback is UTC,
+    so the two only line up to within the photographer's UTC offset. captureTimeSource says which one it is.
+    """
+    if 'captureTime' not in metadata:
+        metadata = dict(metadata)
+        metadata['captureTime'] = datetime.utcfromtimestamp(uploaded_at).replace(microsecond=0).isoformat()
+        metadata['captureTimeSource'] = 'upload'
+    metadata['captureYear'] = int(metadata['captureTime'][:4])
+    return metadata
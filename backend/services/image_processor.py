@@ -1,10 +1,11 @@
 import os
 import uuid
 import base64
-from PIL import Image
+from PIL import Image, ImageOps
 import io
 import anthropic
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from services.image_metadata import extract_metadata
 
 class ImageProcessor:
     """Service for processing images through Omniparser and Claude"""
@@ -94,6 +95,67 @@ class ImageProcessor:
             print(f"Error generating description with Claude: {e}")
             return "Unable to generate detailed description at this time."
     
+    def describe_image_bytes(self, data: bytes, media_type: str = "image/jpeg") -> str:
+        """
+        Generate a detailed description of an image with Claude.
+        Returns None when Claude is not configured so callers don't cache a placeholder.
+        """
+        if not self.anthropic_client:
+            return None
+
+        response = self.anthropic_client.messages.create(
+            model="claude-3-haiku-20240307",
+            max_tokens=300,
+            messages=[{
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": media_type,
+                            "data": base64.b64encode(data).decode('utf-8'),
+                        },
+                    },
+                    {
+                        "type": "text",
+                        "text": "Describe this photo in two or three sentences: the subject, the setting "
+                                "and anything notable about the composition or lighting. "
+                                "Return only the description.",
+                    },
+                ],
+            }]
+        )
+        return response.content[0].text.strip()
+
+    def analyze_image_bytes(self, data: bytes, thumbnail_size: tuple = (400, 400)) -> Tuple[Dict[str, Any], bytes]:
+        """
+        Read metadata from the image headers, then create a JPEG thumbnail,
+        opening the image only once
+        """
+        with Image.open(io.BytesIO(data)) as img:
+            # Header-only: Image.open has parsed size and EXIF without decoding pixels
+            metadata = extract_metadata(img)
+
+            # For JPEGs, let the decoder downscale while reading instead of decoding full size
+            img.draft('RGB', thumbnail_size)
+            # The JPEG save below drops EXIF, so bake the orientation into the pixels
+            # (matches the orientation-corrected width/height in the metadata)
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            output = io.BytesIO()
+            img.save(output, "JPEG", quality=80)
+            return metadata, output.getvalue()
+
+    def read_metadata(self, header: bytes) -> Dict[str, Any]:
+        """
+        Extract metadata from the leading bytes of an image file (no pixel decoding)
+        """
+        with Image.open(io.BytesIO(header)) as img:
+            return extract_metadata(img)
+
     def create_thumbnail(self, image_path: str, thumbnail_size: tuple = (200, 200)) -> str:
         """
         Create thumbnail for uploaded image
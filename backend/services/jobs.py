@@ -0,0 +1,86 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+
+class Job:
+    """Status record for a unit of background work"""
+
+    def __init__(self, job_type: str):
+        self.job_id = str(uuid.uuid4())
+        self.job_type = job_type
+        self.status = 'queued'
+        self.progress = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def set_total(self, total: int):
+        with self._lock:
+            self.total = total
+
+    def advance(self, amount: int = 1):
+        with self._lock:
+            self.progress += amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'job_type': self.job_type,
+                'status': self.status,
+                'progress': self.progress,
+                'total': self.total,
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at,
+            }
+
+
+class JobManager:
+    """Runs background jobs on a small thread pool and tracks their status in memory"""
+
+    def __init__(self, max_workers: int = 4, max_history: int = 500):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='photomind-job')
+        self.max_history = max_history
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_type: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """Schedule fn(*args, job=job, **kwargs) and return its Job record"""
+        job = Job(job_type)
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self._trim_history()
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args, kwargs):
+        job.status = 'running'
+        try:
+            job.result = fn(*args, job=job, **kwargs)
+            job.status = 'completed'
+        except Exception as e:
+            print(f"Error in background job {job.job_type} ({job.job_id}): {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = datetime.utcnow().isoformat()
+
+    def _trim_history(self):
+        if len(self.jobs) <= self.max_history:
+            return
+        finished = [j for j in self.jobs.values() if j.status in ('completed', 'failed')]
+        finished.sort(key=lambda j: j.created_at)
+        for job in finished[:len(self.jobs) - self.max_history]:
+            del self.jobs[job.job_id]
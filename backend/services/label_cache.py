@@ -0,0 +1,168 @@
+import hashlib
+import json
+import threading
+import time
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of an image's bytes, used as the label cache key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def derive_tags(raw_response: Dict[str, Any], max_labels: int, min_confidence: float) -> List[Dict[str, Any]]:
+    """Rebuild the stored tag list from a cached Rekognition response without calling the API"""
+    labels = [label for label in raw_response.get('Labels', []) if label.get('Confidence', 0) >= min_confidence]
+    labels.sort(key=lambda label: label['Confidence'], reverse=True)
+    return [
+        {'name': label['Name'], 'confidence': Decimal(str(label['Confidence']))}
+        for label in labels[:max_labels]
+    ]
+
+
+class RateLimiter:
+    """Token bucket limiting outbound calls to a fixed rate, shared across threads"""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class LabelCacheService:
+    """Caches raw Rekognition detect_labels responses in DynamoDB, keyed by content hash"""
+
+    def __init__(self, cache_table, rekognition_client, s3_client, rate_limiter: RateLimiter,
+                 fetch_max_labels: int = 50, fetch_min_confidence: float = 50):
+        self.cache_table = cache_table
+        self.rekognition = rekognition_client
+        self.s3 = s3_client
+        self.rate_limiter = rate_limiter
+        # Request a wide label set once so tighter thresholds can be derived offline later
+        self.fetch_max_labels = fetch_max_labels
+        self.fetch_min_confidence = fetch_min_confidence
+
+    def check_thresholds(self, max_labels: int, min_confidence: float):
+        """Tags can only be derived within the fetched label set; raises ValueError outside it"""
+        if not 1 <= max_labels <= self.fetch_max_labels:
+            raise ValueError(f'max_labels must be between 1 and {self.fetch_max_labels}')
+        if not self.fetch_min_confidence <= min_confidence <= 100:
+            raise ValueError(f'min_confidence must be between {self.fetch_min_confidence:g} and 100')
+
+    def get_cached(self, digest: str) -> Optional[Dict[str, Any]]:
+        response = self.cache_table.get_item(Key={'content_hash': digest})
+        item = response.get('Item')
+        if not item:
+            return None
+        # Entries fetched with narrower limits than the current ones would silently cut tags off: refetch
+        if int(item.get('max_labels', 0)) < self.fetch_max_labels \
+                or float(item.get('min_confidence', 100)) > self.fetch_min_confidence:
+            return None
+        return json.loads(item['response'])
+
+    def _store(self, digest: str, raw_response: Dict[str, Any]):
+        self.cache_table.put_item(Item={
+            'content_hash': digest,
+            'response': json.dumps(raw_response),
+            'max_labels': self.fetch_max_labels,
+            'min_confidence': Decimal(str(self.fetch_min_confidence)),
+            'label_model_version': raw_response.get('LabelModelVersion', ''),
+            'created_at': datetime.utcnow().isoformat(),
+        })
+
+    def detect_labels(self, bucket: str, key: str, digest: str) -> Dict[str, Any]:
+        """Return the raw label response for an S3 object, calling Rekognition only on a cache miss"""
+        cached = self.get_cached(digest)
+        if cached is not None:
+            return cached
+        return self._call_rekognition(bucket, key, digest)
+
+    def _call_rekognition(self, bucket: str, key: str, digest: str) -> Dict[str, Any]:
+        self.rate_limiter.acquire()
+        response = self.rekognition.detect_labels(
+            Image={"S3Object": {"Bucket": bucket, "Name": key}},
+            MaxLabels=self.fetch_max_labels,
+            MinConfidence=self.fetch_min_confidence
+        )
+        # Keep parents, categories, aliases and instance bounding boxes; drop request metadata
+        raw_response = {k: v for k, v in response.items() if k != 'ResponseMetadata'}
+        self._store(digest, raw_response)
+        return raw_response
+
+    def relabel_library(self, images_table, bucket: str, max_labels: int, min_confidence: float,
+                        job=None, total: Optional[int] = None) -> Dict[str, int]:
+        """
+        Re-derive every image's tags, reusing cached responses and calling Rekognition for misses.
+        `total` sets the job's progress total; DynamoDB's approximate item count is used without it.
+        """
+        stats = {'images': 0, 'cache_hits': 0, 'cache_misses': 0, 'skipped': 0, 'errors': 0}
+        if job:
+            job.set_total(total if total is not None else images_table.item_count)
+        kwargs = {}
+        while True:
+            response = images_table.scan(**kwargs)
+            for image in response.get('Items', []):
+                try:
+                    self._relabel_image(images_table, bucket, image, max_labels, min_confidence, stats)
+                except Exception as e:
+                    # One bad image (missing object, corrupt cached response) must not stop the library
+                    print(f"Error relabeling image {image.get('id')}: {e}")
+                    stats['errors'] += 1
+                stats['images'] += 1
+                if job:
+                    job.advance()
+            if 'LastEvaluatedKey' not in response:
+                return stats
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _relabel_image(self, images_table, bucket: str, image: Dict[str, Any],
+                       max_labels: int, min_confidence: float, stats: Dict[str, int]):
+        key = image.get('s3Key') or f"{image['id']}_{image.get('filename', '')}"
+        digest = image.get('contentHash')
+        if not digest:
+            # Images uploaded before caching existed: hash the original once (S3 GET, not a Rekognition call)
+            obj = self.s3.get_object(Bucket=bucket, Key=key)
+            digest = content_hash(obj['Body'].read())
+
+        raw_response = self.get_cached(digest)
+        if raw_response is not None:
+            stats['cache_hits'] += 1
+        else:
+            stats['cache_misses'] += 1
+            raw_response = self._call_rekognition(bucket, key, digest)
+
+        try:
+            images_table.update_item(
+                Key={'id': image['id']},
+                UpdateExpression='SET tags = :tags, contentHash = :hash, s3Key = :key',
+                ConditionExpression=Attr('id').exists(),
+                ExpressionAttributeValues={
+                    ':tags': derive_tags(raw_response, max_labels, min_confidence),
+                    ':hash': digest,
+                    ':key': key,
+                }
+            )
+        except ClientError as e:
+            # Deleted while the relabel was running; don't recreate a partial item
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                stats['skipped'] += 1
+                return
+            raise
@@ -0,0 +1,55 @@
+from boto3.dynamodb.conditions import Key
+from typing import Any, Dict
+
+from services.image_index import USER_DATE_INDEX
+
+
+class LibraryStatsService:
+    """Per-user counters on the users table, so totals never require a scan"""
+
+    def __init__(self, users_table, images_table):
+        self.users_table = users_table
+        self.images_table = images_table
+
+    def adjust_image_count(self, user_id: str, delta: int):
+        if not user_id or not delta:
+            return
+        self.users_table.update_item(
+            Key={'user_id': user_id},
+            UpdateExpression='ADD image_count :delta',
+            ExpressionAttributeValues={':delta': delta}
+        )
+
+    def image_count(self, user_id: str) -> int:
+        response = self.users_table.get_item(
+            Key={'user_id': user_id},
+            ProjectionExpression='image_count'
+        )
+        return max(0, int(response.get('Item', {}).get('image_count', 0)))
+
+    def recount(self, user_id: str, job=None) -> Dict[str, Any]:
+        """
+        Reset the counter from the user's index (COUNT queries only return counts, not items).
+        For libraries that predate the counter, or to repair drift.
+        """
+        kwargs = {
+            'IndexName': USER_DATE_INDEX,
+            'KeyConditionExpression': Key('userId').eq(user_id),
+            'Select': 'COUNT',
+        }
+        count = 0
+        while True:
+            response = self.images_table.query(**kwargs)
+            count += response.get('Count', 0)
+            if job:
+                job.advance(response.get('Count', 0))
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        self.users_table.update_item(
+            Key={'user_id': user_id},
+            UpdateExpression='SET image_count = :count',
+            ExpressionAttributeValues={':count': count}
+        )
+        return {'image_count': count}
@@ -0,0 +1,44 @@
+import base64
+import json
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+
+def _encode_value(value):
+    if isinstance(value, Decimal):
+        return {'$n': str(value)}
+    raise TypeError(f"Cannot encode {type(value).__name__} in cursor")
+
+
+def _decode_value(obj):
+    if set(obj.keys()) == {'$n'}:
+        return Decimal(obj['$n'])
+    return obj
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Turn a DynamoDB LastEvaluatedKey into an opaque, URL-safe cursor"""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, default=_encode_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Turn a cursor from encode_cursor back into an ExclusiveStartKey"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        return json.loads(raw, object_hook=_decode_value)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def parse_limit(value: Optional[str], default: int = 50, maximum: int = 200) -> int:
+    """Clamp a ?limit= query parameter into [1, maximum]"""
+    try:
+        limit = int(value) if value is not None else default
+    except ValueError:
+        limit = default
+    return max(1, min(limit, maximum))
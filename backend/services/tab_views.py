@@ -0,0 +1,233 @@
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import time
+
+from services.image_index import USER_DATE_INDEX
+
+# Attributes copied from an images_table item into each tab_images row, so a tab
+# page can be rendered straight from the view without touching images_table.
+PHOTO_ATTRIBUTES = ('id', 's3Url', 'thumbnailUrl', 'filename', 'dateModified', 'tags', 'userId')
+
+# Uploads stamped this long before a rebuild's scan started are re-checked afterwards (clock skew between workers)
+CATCH_UP_MARGIN_SECONDS = 60
+
+
+def image_sort_key(image: Dict[str, Any]) -> str:
+    """Sort key that orders images by upload time, newest last, with the id as tie-breaker"""
+    try:
+        timestamp = float(image.get('dateModified', 0))
+    except (TypeError, ValueError):
+        timestamp = 0.0
+    return f"{timestamp:017.6f}#{image['id']}"
+
+
+def match_tab_tag(tab_tags: List[str], image_tags: List[Dict[str, Any]]) -> Optional[str]:
+    """Return the first image tag matching the tab's tag set (same rule as the gallery filter)"""
+    for tag in image_tags or []:
+        name = str(tag.get('name', '')).lower()
+        if name and any(name in tab_tag for tab_tag in tab_tags):
+            return name
+    return None
+
+
+class TabViewService:
+    """Maintains per-tab materialized image lists in the tab_images table"""
+
+    def __init__(self, images_table, tabs_table, tab_images_table,
+                 tag_selector: Callable[[str, List[str]], List[Dict[str, Any]]],
+                 pending_timeout: int = 15 * 60):
+        self.images_table = images_table
+        self.tabs_table = tabs_table
+        self.tab_images_table = tab_images_table
+        self.tag_selector = tag_selector
+        # A view pending for longer than this lost its job (worker restart) and may be rescheduled
+        self.pending_timeout = pending_timeout
+
+    @staticmethod
+    def tab_key(tab: Dict[str, Any]) -> Dict[str, str]:
+        return {'user_id': tab['user_id'], 'tab_id': tab['tab_id']}
+
+    def get_tab(self, user_id: str, tab_id: str) -> Optional[Dict[str, Any]]:
+        response = self.tabs_table.get_item(Key={'user_id': user_id, 'tab_id': tab_id})
+        return response.get('Item')
+
+    def mark_pending(self, tab: Dict[str, Any]):
+        """Flag a tab as needing (re)materialization before its job runs"""
+        self.tabs_table.update_item(
+            Key=self.tab_key(tab),
+            UpdateExpression='SET view_status = :pending, pending_since = :now',
+            ExpressionAttributeValues={':pending': 'pending', ':now': int(time.time())}
+        )
+
+    def needs_materialization(self, tab: Dict[str, Any]) -> bool:
+        """No view yet, a failed build, or a pending build whose job has gone stale"""
+        status = tab.get('view_status')
+        if status is None or status == 'failed':
+            return True
+        return status == 'pending' and int(tab.get('pending_since', 0)) < time.time() - self.pending_timeout
+
+    def _scan_images(self) -> List[Dict[str, Any]]:
+        projection = ', '.join(f'#{a}' for a in PHOTO_ATTRIBUTES)
+        names = {f'#{a}': a for a in PHOTO_ATTRIBUTES}
+        items = []
+        kwargs = {'ProjectionExpression': projection, 'ExpressionAttributeNames': names}
+        while True:
+            response = self.images_table.scan(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _view_row(self, tab_id: str, image: Dict[str, Any], matched_tag: str) -> Dict[str, Any]:
+        row = {a: image[a] for a in PHOTO_ATTRIBUTES if a in image}
+        row['tab_id'] = tab_id
+        row['sort_key'] = image_sort_key(image)
+        row['matched_tag'] = matched_tag
+        return row
+
+    def _clear_view(self, tab_id: str):
+        kwargs = {
+            'KeyConditionExpression': Key('tab_id').eq(tab_id),
+            'ProjectionExpression': 'tab_id, sort_key',
+        }
+        with self.tab_images_table.batch_writer() as batch:
+            while True:
+                response = self.tab_images_table.query(**kwargs)
+                for item in response.get('Items', []):
+                    batch.delete_item(Key={'tab_id': item['tab_id'], 'sort_key': item['sort_key']})
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def materialize_tab(self, tab: Dict[str, Any], job=None) -> Dict[str, Any]:
+        """
+        Compute a tab's tag set and matching images and store them in tab_images.
+        On error the view is marked failed so the next open schedules it again.
+        """
+        try:
+            return self._materialize(tab, job)
+        except Exception as e:
+            self.tabs_table.update_item(
+                Key=self.tab_key(tab),
+                UpdateExpression='SET view_status = :failed, view_error = :error',
+                ExpressionAttributeValues={':failed': 'failed', ':error': str(e)[:1000]}
+            )
+            raise
+
+    def _materialize(self, tab: Dict[str, Any], job=None) -> Dict[str, Any]:
+        scan_started = time.time()
+        images = self._scan_images()
+        if job:
+            job.set_total(len(images))
+
+        # Most frequent first, so the tag selector's shortlist favours common tags
+        vocabulary = [name for name, _ in Counter(
+            str(tag['name']) for image in images for tag in image.get('tags', []) if 'name' in tag
+        ).most_common()]
+        selected = self.tag_selector(tab['tab_name'], vocabulary) if vocabulary else []
+        tab_tags = [str(entry['tag']).lower() for entry in selected if entry.get('tag')]
+
+        self._clear_view(tab['tab_id'])
+        if not tab_tags:
+            # Nothing in the vocabulary fits the tab yet (e.g. a fresh library). An empty tag set would
+            # never match, so the view stays unbuilt until an upload brings in a new tag
+            self.tabs_table.update_item(
+                Key=self.tab_key(tab),
+                UpdateExpression='SET view_status = :empty, view_tags = :tags, image_count = :zero REMOVE view_error',
+                ExpressionAttributeValues={':empty': 'empty', ':tags': [], ':zero': 0}
+            )
+            return {'tab_id': tab['tab_id'], 'tags': [], 'image_count': 0}
+
+        image_count = 0
+        with self.tab_images_table.batch_writer() as batch:
+            for image in images:
+                matched = match_tab_tag(tab_tags, image.get('tags', []))
+                if matched:
+                    batch.put_item(Item=self._view_row(tab['tab_id'], image, matched))
+                    image_count += 1
+                if job:
+                    job.advance()
+
+        self.tabs_table.update_item(
+            Key=self.tab_key(tab),
+            UpdateExpression='SET view_status = :ready, view_tags = :tags, image_count = :count, '
+                             'materialized_at = :at REMOVE view_error',
+            ExpressionAttributeValues={
+                ':ready': 'ready',
+                ':tags': tab_tags,
+                ':count': image_count,
+                ':at': datetime.utcnow().isoformat(),
+            }
+        )
+
+        # Uploads that landed after the scan started skipped this tab while it was pending;
+        # once it is ready, add_image covers new ones, so only that window needs catching up
+        image_count += self._catch_up(dict(tab, view_tags=tab_tags), scan_started - CATCH_UP_MARGIN_SECONDS)
+        return {'tab_id': tab['tab_id'], 'tags': tab_tags, 'image_count': image_count}
+
+    def _catch_up(self, tab: Dict[str, Any], since: float) -> int:
+        kwargs = {
+            'IndexName': USER_DATE_INDEX,
+            'KeyConditionExpression': Key('userId').eq(tab['user_id']) & Key('dateModified').gte(str(since)),
+            'ProjectionExpression': ', '.join(f'#{a}' for a in PHOTO_ATTRIBUTES),
+            'ExpressionAttributeNames': {f'#{a}': a for a in PHOTO_ATTRIBUTES},
+        }
+        added = 0
+        while True:
+            response = self.images_table.query(**kwargs)
+            added += sum(self._add_to_tab(tab, image) for image in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return added
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _add_to_tab(self, tab: Dict[str, Any], image: Dict[str, Any]) -> bool:
+        """Add one image to a tab's view if it matches and isn't there yet; the count only moves on a new row"""
+        matched = match_tab_tag(tab.get('view_tags', []), image.get('tags', []))
+        if not matched:
+            return False
+        try:
+            self.tab_images_table.put_item(
+                Item=self._view_row(tab['tab_id'], image, matched),
+                ConditionExpression='attribute_not_exists(sort_key)'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+        self.tabs_table.update_item(
+            Key=self.tab_key(tab),
+            UpdateExpression='ADD image_count :one',
+            ExpressionAttributeValues={':one': 1}
+        )
+        return True
+
+    def built_tabs(self) -> List[Dict[str, Any]]:
+        """Tabs whose build finished (ready, or empty for lack of matching tags)"""
+        response = self.tabs_table.scan(FilterExpression=Attr('view_status').is_in(['ready', 'empty']))
+        return response.get('Items', [])
+
+    def add_image(self, image: Dict[str, Any], job=None) -> int:
+        """
+        Append a newly uploaded image to every ready tab whose tag set it matches.
+        Tabs still building pick it up in their catch-up pass.
+        """
+        response = self.tabs_table.scan(FilterExpression=Attr('view_status').eq('ready'))
+        return sum(self._add_to_tab(tab, image) for tab in response.get('Items', []))
+
+    def get_page(self, tab_id: str, limit: int, start_key: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Read one page of a tab's materialized images, newest first"""
+        kwargs = {
+            'KeyConditionExpression': Key('tab_id').eq(tab_id),
+            'ScanIndexForward': False,
+            'Limit': limit,
+        }
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        response = self.tab_images_table.query(**kwargs)
+        return {
+            'items': response.get('Items', []),
+            'last_evaluated_key': response.get('LastEvaluatedKey'),
+        }
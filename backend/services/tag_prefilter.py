@@ -0,0 +1,118 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r'[^a-z0-9 ]+', ' ', text.lower()).strip()
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('es') and (word[-3] in 'sxz' or word[-4:-2] in ('ch', 'sh')):
+        return word[:-2]
+    if len(word) > 2 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def _singular_phrase(text: str) -> List[str]:
+    """Normalized words, each singularized"""
+    return [_singular(w) for w in _normalize(text).split()]
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class TagPrefilter:
+    """Trigram index over the tag vocabulary used to shortlist tags before an LLM call"""
+
+    def __init__(self, vocabulary: List[str], min_score: float = 0.35):
+        # vocabulary is expected in priority order (most frequent first); it backfills the shortlist
+        self.vocabulary = list(dict.fromkeys(vocabulary))
+        self.min_score = min_score
+        # Tags are normalized exactly like query terms, so 'Sports Car' and 'sports cars' compare equal
+        self.terms = [' '.join(_singular_phrase(tag)) for tag in self.vocabulary]
+        self.grams = [_trigrams(term) for term in self.terms]
+        self.index: Dict[str, Set[int]] = defaultdict(set)
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.index[gram].add(i)
+
+    def _query_terms(self, query: str) -> List[str]:
+        words = _singular_phrase(query)
+        terms = [' '.join(words)] + words
+        return [t for t in dict.fromkeys(terms) if t]
+
+    def lexical_matches(self, query: str) -> List[Tuple[str, float]]:
+        """Tags sharing trigrams with the query or one of its words, best score first"""
+        scores: Dict[int, float] = {}
+        for term in self._query_terms(query):
+            term_grams = _trigrams(term)
+            candidates = set()
+            for gram in term_grams:
+                candidates |= self.index.get(gram, set())
+            for i in candidates:
+                score = _dice(term_grams, self.grams[i])
+                if score > scores.get(i, 0.0):
+                    scores[i] = score
+        ranked = sorted(((i, s) for i, s in scores.items() if s >= self.min_score), key=lambda x: (-x[1], x[0]))
+        return [(self.vocabulary[i], score) for i, score in ranked]
+
+    def exact_matches(self, query: str) -> List[str]:
+        """Tags equal to the whole query (singular/plural and case insensitive)"""
+        terms = self._query_terms(query)
+        if not terms:
+            return []
+        whole = terms[0]
+        return [tag for tag, term in zip(self.vocabulary, self.terms) if term == whole]
+
+    def shortlist(self, query: str, limit: int) -> List[str]:
+        """Top `limit` candidate tags: lexical matches first, then the most frequent remaining tags"""
+        picked = [tag for tag, _ in self.lexical_matches(query)][:limit]
+        if len(picked) < limit:
+            seen = set(picked)
+            for tag in self.vocabulary:
+                if tag not in seen:
+                    picked.append(tag)
+                    if len(picked) >= limit:
+                        break
+        return picked
+
+
+class CachedPrefilter:
+    """
+    Keeps one TagPrefilter built from `load()` for `ttl` seconds, so requests don't each re-read
+    the whole vocabulary and rebuild the trigram index. invalidate() forces a reload (this process only;
+    other workers pick the change up when their TTL expires).
+    """
+
+    def __init__(self, load: Callable[[], List[str]], ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.load = load
+        self.ttl = ttl
+        self.clock = clock
+        self._prefilter: Optional[TagPrefilter] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> TagPrefilter:
+        with self._lock:
+            if self._prefilter is None or self.clock() - self._loaded_at >= self.ttl:
+                self._prefilter = TagPrefilter(self.load())
+                self._loaded_at = self.clock()
+            return self._prefilter
+
+    def invalidate(self):
+        with self._lock:
+            self._prefilter = None
@@ -0,0 +1,177 @@
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List
+
+# Every tag item carries the same value in this attribute so the CountIndex GSI
+# (rank_bucket HASH, image_count RANGE) returns the vocabulary ordered by frequency.
+RANK_BUCKET = 'all'
+COUNT_INDEX = 'CountIndex'
+
+
+class TagStatsService:
+    """Keeps per-tag image counts and confidence stats in tags_table"""
+
+    def __init__(self, tags_table, images_table, max_workers: int = 8):
+        self.tags_table = tags_table
+        self.images_table = images_table
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='photomind-tags')
+
+    def _upsert_tag(self, name: str, confidence: Decimal, delta: int = 1, confidence_sum: Decimal = None) -> int:
+        """Apply one tag's deltas and return its new image_count"""
+        set_clause = 'SET rank_bucket = :bucket, updated_at = :now'
+        add_clause = 'ADD image_count :delta, confidence_sum :conf'
+        values = {
+            ':bucket': RANK_BUCKET,
+            ':now': datetime.utcnow().isoformat(),
+            ':delta': delta,
+            ':conf': confidence * delta if confidence_sum is None else confidence_sum,
+        }
+        if delta > 0:
+            # Raise max_confidence in the same write when this image beats it
+            try:
+                response = self.tags_table.update_item(
+                    Key={'name': name},
+                    UpdateExpression=f'{set_clause}, max_confidence = :max {add_clause}',
+                    ConditionExpression='attribute_not_exists(max_confidence) OR max_confidence < :max',
+                    ExpressionAttributeValues=dict(values, **{':max': confidence}),
+                    ReturnValues='UPDATED_NEW'
+                )
+                return int(response['Attributes']['image_count'])
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        # Removals leave max_confidence as an upper bound until the next rebuild()
+        response = self.tags_table.update_item(
+            Key={'name': name},
+            UpdateExpression=f'{set_clause} {add_clause}',
+            ExpressionAttributeValues=values,
+            ReturnValues='UPDATED_NEW'
+        )
+        return int(response['Attributes']['image_count'])
+
+    def record_image(self, tags: List[Dict[str, Any]], delta: int = 1, job=None) -> List[str]:
+        """
+        Count an image's tags in (delta=1) or out (delta=-1) of the vocabulary stats, one parallel upsert per tag.
+        Returns the tags this image brought into the vocabulary (image_count went from 0 to 1).
+        """
+        names = {}
+        for tag in tags or []:
+            names[tag['name']] = Decimal(str(tag['confidence']))
+        futures = {name: self.executor.submit(self._upsert_tag, name, conf, delta) for name, conf in names.items()}
+        counts = {name: future.result() for name, future in futures.items()}
+        return [name for name, count in counts.items() if delta > 0 and count == delta]
+
+    def remove_images(self, images: List[Dict[str, Any]]):
+        """Count many deleted images out of the stats with one update per distinct tag"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for image in images:
+            names = {}
+            for tag in image.get('tags', []):
+                names[tag['name']] = Decimal(str(tag['confidence']))
+            for name, conf in names.items():
+                entry = totals.setdefault(name, {'count': 0, 'sum': Decimal(0)})
+                entry['count'] += 1
+                entry['sum'] += conf
+        futures = [
+            self.executor.submit(self._upsert_tag, name, Decimal(0), -entry['count'], -entry['sum'])
+            for name, entry in totals.items()
+        ]
+        for future in futures:
+            future.result()
+
+    def top_tags(self, limit: int = None) -> List[Dict[str, Any]]:
+        """Vocabulary ordered by image count, read straight from the CountIndex"""
+        kwargs = {
+            'IndexName': COUNT_INDEX,
+            'KeyConditionExpression': Key('rank_bucket').eq(RANK_BUCKET),
+            'ScanIndexForward': False,
+        }
+        tags = []
+        while True:
+            if limit:
+                kwargs['Limit'] = limit - len(tags)
+            response = self.tags_table.query(**kwargs)
+            tags.extend(self._format(item) for item in response.get('Items', []) if item.get('image_count', 0) > 0)
+            if 'LastEvaluatedKey' not in response or (limit and len(tags) >= limit):
+                return tags
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    @staticmethod
+    def _format(item: Dict[str, Any]) -> Dict[str, Any]:
+        count = int(item.get('image_count', 0))
+        total = float(item.get('confidence_sum', 0))
+        return {
+            'name': item['name'],
+            'image_count': count,
+            'max_confidence': float(item.get('max_confidence', 0)),
+            'mean_confidence': total / count if count else 0.0,
+        }
+
+    def _scan_segment(self, segment: int, total_segments: int) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        kwargs = {
+            'Segment': segment,
+            'TotalSegments': total_segments,
+            'ProjectionExpression': '#t',
+            'ExpressionAttributeNames': {'#t': 'tags'},
+        }
+        while True:
+            response = self.images_table.scan(**kwargs)
+            for image in response.get('Items', []):
+                seen = set()
+                for tag in image.get('tags', []):
+                    if tag['name'] in seen:
+                        continue
+                    seen.add(tag['name'])
+                    conf = Decimal(str(tag['confidence']))
+                    entry = stats.setdefault(tag['name'], {'count': 0, 'sum': Decimal(0), 'max': conf})
+                    entry['count'] += 1
+                    entry['sum'] += conf
+                    entry['max'] = max(entry['max'], conf)
+            if 'LastEvaluatedKey' not in response:
+                return stats
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def rebuild(self, total_segments: int = 4, job=None) -> Dict[str, int]:
+        """Recompute every tag's stats from images_table with a parallel scan and overwrite tags_table"""
+        if job:
+            job.set_total(total_segments)
+        merged: Dict[str, Dict[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=total_segments) as pool:
+            futures = [pool.submit(self._scan_segment, i, total_segments) for i in range(total_segments)]
+            for future in futures:
+                for name, entry in future.result().items():
+                    target = merged.setdefault(name, {'count': 0, 'sum': Decimal(0), 'max': entry['max']})
+                    target['count'] += entry['count']
+                    target['sum'] += entry['sum']
+                    target['max'] = max(target['max'], entry['max'])
+                if job:
+                    job.advance()
+
+        stale = set()
+        kwargs = {'ProjectionExpression': '#n', 'ExpressionAttributeNames': {'#n': 'name'}}
+        while True:
+            response = self.tags_table.scan(**kwargs)
+            stale.update(item['name'] for item in response.get('Items', []) if item['name'] not in merged)
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        now = datetime.utcnow().isoformat()
+        with self.tags_table.batch_writer() as batch:
+            for name, entry in merged.items():
+                batch.put_item(Item={
+                    'name': name,
+                    'rank_bucket': RANK_BUCKET,
+                    'image_count': entry['count'],
+                    'confidence_sum': entry['sum'],
+                    'max_confidence': entry['max'],
+                    'updated_at': now,
+                })
+            for name in stale:
+                batch.delete_item(Key={'name': name})
+
+        return {'tags': len(merged), 'removed': len(stale)}
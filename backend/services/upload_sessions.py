@@ -0,0 +1,191 @@
+import math
+import time
+import uuid
+from botocore.exceptions import ClientError
+from typing import Any, Dict, List, Optional
+
+# S3's minimum size for every multipart part except the last
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class UploadSessionError(Exception):
+    """Raised when an upload session request is invalid"""
+
+
+class UploadSessionService:
+    """Hands out presigned S3 upload URLs and tracks sessions until the object is ingested"""
+
+    def __init__(self, sessions_table, s3_client, bucket: str, max_size: int,
+                 part_size: int = MIN_PART_SIZE, url_ttl: int = 900, session_ttl: int = 24 * 3600,
+                 ingest_timeout: int = 15 * 60):
+        self.sessions_table = sessions_table
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.max_size = max_size
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.url_ttl = url_ttl
+        self.session_ttl = session_ttl
+        # An `ingesting` claim older than this is assumed dead (worker crashed) and may be re-claimed
+        self.ingest_timeout = ingest_timeout
+
+    def create(self, user_id: str, filename: str, content_type: str, size: int) -> Dict[str, Any]:
+        """Start a session: a single presigned PUT, or presigned parts for files larger than one part"""
+        if not filename:
+            raise UploadSessionError('filename is required')
+        if not content_type or not content_type.startswith('image/'):
+            raise UploadSessionError('content_type must be an image type')
+        if size <= 0 or size > self.max_size:
+            raise UploadSessionError(f'size must be between 1 and {self.max_size} bytes')
+
+        session_id = str(uuid.uuid4())
+        key = f"{session_id}_{filename}"
+        session = {
+            'session_id': session_id,
+            'user_id': user_id,
+            's3_key': key,
+            'filename': filename,
+            'content_type': content_type,
+            'size': size,
+            'status': 'pending',
+            'expires_at': int(time.time()) + self.session_ttl,
+        }
+        response = {'session_id': session_id, 'image_id': session_id, 'key': key}
+
+        if size <= self.part_size:
+            # ContentType and ContentLength are signed, so S3 rejects any other type or size
+            response['method'] = 'PUT'
+            response['url'] = self.s3.generate_presigned_url(
+                'put_object',
+                Params={'Bucket': self.bucket, 'Key': key, 'ContentType': content_type, 'ContentLength': size},
+                ExpiresIn=self.url_ttl
+            )
+        else:
+            upload = self.s3.create_multipart_upload(Bucket=self.bucket, Key=key, ContentType=content_type)
+            session['upload_id'] = upload['UploadId']
+            part_count = math.ceil(size / self.part_size)
+            response['method'] = 'MULTIPART'
+            response['part_size'] = self.part_size
+            response['parts'] = [
+                {
+                    'part_number': number,
+                    'url': self.s3.generate_presigned_url(
+                        'upload_part',
+                        Params={
+                            'Bucket': self.bucket,
+                            'Key': key,
+                            'UploadId': upload['UploadId'],
+                            'PartNumber': number,
+                            'ContentLength': min(self.part_size, size - (number - 1) * self.part_size),
+                        },
+                        ExpiresIn=self.url_ttl
+                    ),
+                }
+                for number in range(1, part_count + 1)
+            ]
+
+        self.sessions_table.put_item(Item=session)
+        return response
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self.sessions_table.get_item(Key={'session_id': session_id}).get('Item')
+
+    def _claimable(self, session: Dict[str, Any]) -> bool:
+        """pending, failed, or ingesting with a claim that has gone stale"""
+        if session['status'] in ('pending', 'failed'):
+            return True
+        return session['status'] == 'ingesting' \
+            and int(session.get('claimed_at', 0)) < int(time.time()) - self.ingest_timeout
+
+    def complete(self, session_id: str, parts: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Finish the upload and claim the session for ingestion. Returns the session if this call
+        claimed it, or None if it is completed or being ingested (by the client callback or an S3 event).
+        A failed or stale ingest is claimed again, so retrying the callback retries the ingest.
+        """
+        session = self.get(session_id)
+        if not session:
+            raise UploadSessionError('Unknown upload session')
+        if not self._claimable(session):
+            return None
+
+        if session.get('upload_id'):
+            if not parts:
+                raise UploadSessionError('parts are required to complete a multipart upload')
+            try:
+                self.s3.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=session['s3_key'],
+                    UploadId=session['upload_id'],
+                    MultipartUpload={'Parts': sorted(
+                        ({'PartNumber': int(p['part_number']), 'ETag': p['etag']} for p in parts),
+                        key=lambda p: p['PartNumber']
+                    )}
+                )
+            except ClientError as e:
+                # A retried callback finds the upload already assembled
+                if e.response['Error']['Code'] != 'NoSuchUpload':
+                    raise
+
+        self._verify_object(session)
+        return self._claim(session)
+
+    def claim_from_event(self, key: str) -> Optional[Dict[str, Any]]:
+        """S3 ObjectCreated stand-in: claim the session that owns an uploaded key"""
+        session_id = key.split('_', 1)[0]
+        session = self.get(session_id)
+        if not session or session['s3_key'] != key or not self._claimable(session):
+            return None
+        self._verify_object(session)
+        return self._claim(session)
+
+    def _verify_object(self, session: Dict[str, Any]):
+        try:
+            head = self.s3.head_object(Bucket=self.bucket, Key=session['s3_key'])
+        except ClientError:
+            raise UploadSessionError('Uploaded object not found')
+        if head['ContentLength'] != int(session['size']) or head.get('ContentType') != session['content_type']:
+            raise UploadSessionError('Uploaded object does not match the session size or content type')
+
+    def _claim(self, session: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """pending/failed/stale ingesting -> ingesting; the condition makes concurrent claims exclusive"""
+        now = int(time.time())
+        try:
+            self.sessions_table.update_item(
+                Key={'session_id': session['session_id']},
+                UpdateExpression='SET #status = :ingesting, claimed_at = :now',
+                ConditionExpression='#status IN (:pending, :failed) OR (#status = :ingesting AND claimed_at < :stale)',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':ingesting': 'ingesting',
+                    ':pending': 'pending',
+                    ':failed': 'failed',
+                    ':now': now,
+                    ':stale': now - self.ingest_timeout,
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return None
+            raise
+        return dict(session, status='ingesting', claimed_at=now)
+
+    def mark_completed(self, session_id: str):
+        self._set_status(session_id, 'completed')
+
+    def mark_failed(self, session_id: str, error: str):
+        self._set_status(session_id, 'failed', error)
+
+    def _set_status(self, session_id: str, status: str, error: Optional[str] = None):
+        update = 'SET #status = :status'
+        values = {':status': status}
+        if error is not None:
+            update += ', #error = :error'
+            values[':error'] = error[:1000]
+        else:
+            update += ' REMOVE #error'
+        self.sessions_table.update_item(
+            Key={'session_id': session_id},
+            UpdateExpression=update,
+            ExpressionAttributeNames={'#status': 'status', '#error': 'error'},
+            ExpressionAttributeValues=values
+        )
@@ -0,0 +1,97 @@
+from services.tag_prefilter import CachedPrefilter, TagPrefilter
+
+
+VOCABULARY = ['Beach', 'Sports Car', 'Dog', 'Puppy', 'Dish', 'Box', 'Sky', 'Car', 'Glass']
+
+
+def test_exact_match_is_case_insensitive():
+    assert TagPrefilter(VOCABULARY).exact_matches('dog') == ['Dog']
+
+
+def test_exact_match_multi_word_tag():
+    assert TagPrefilter(VOCABULARY).exact_matches('Sports Car') == ['Sports Car']
+    assert TagPrefilter(VOCABULARY).exact_matches('sports cars') == ['Sports Car']
+
+
+def test_exact_match_plurals():
+    prefilter = TagPrefilter(VOCABULARY)
+    assert prefilter.exact_matches('beaches') == ['Beach']
+    assert prefilter.exact_matches('dishes') == ['Dish']
+    assert prefilter.exact_matches('boxes') == ['Box']
+    assert prefilter.exact_matches('puppies') == ['Puppy']
+    assert prefilter.exact_matches('dogs') == ['Dog']
+
+
+def test_exact_match_keeps_double_s():
+    assert TagPrefilter(VOCABULARY).exact_matches('glass') == ['Glass']
+
+
+def test_exact_match_ignores_punctuation():
+    assert TagPrefilter(VOCABULARY).exact_matches('  sports-car! ') == ['Sports Car']
+
+
+def test_no_exact_match_for_partial_query():
+    assert TagPrefilter(VOCABULARY).exact_matches('dogs on the beach') == []
+    assert TagPrefilter(VOCABULARY).exact_matches('') == []
+
+
+def test_lexical_matches_rank_closest_first():
+    matches = TagPrefilter(VOCABULARY).lexical_matches('sports car')
+    assert matches[0][0] == 'Sports Car'
+    assert 'Car' in [tag for tag, _ in matches]
+    assert 'Dog' not in [tag for tag, _ in matches]
+
+
+def test_lexical_matches_individual_words():
+    tags = [tag for tag, _ in TagPrefilter(VOCABULARY).lexical_matches('dogs on the beach')]
+    assert 'Dog' in tags
+    assert 'Beach' in tags
+
+
+def test_shortlist_backfills_in_vocabulary_order():
+    shortlist = TagPrefilter(VOCABULARY).shortlist('beach', 3)
+    assert shortlist == ['Beach', 'Sports Car', 'Dog']
+
+
+def test_shortlist_respects_limit():
+    assert len(TagPrefilter(VOCABULARY).shortlist('car', 2)) == 2
+    assert TagPrefilter(VOCABULARY).shortlist('car', 2)[0] == 'Car'
+
+
+def test_duplicate_vocabulary_entries_are_dropped():
+    assert TagPrefilter(['Dog', 'Dog', 'Cat']).vocabulary == ['Dog', 'Cat']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cached_prefilter_reuses_index_within_ttl():
+    loads = []
+    clock = FakeClock()
+    cached = CachedPrefilter(lambda: loads.append(1) or ['Dog'], ttl=60, clock=clock)
+    first = cached.get()
+    clock.now = 59
+    assert cached.get() is first
+    assert len(loads) == 1
+
+
+def test_cached_prefilter_reloads_after_ttl():
+    vocabularies = iter([['Dog'], ['Dog', 'Cat']])
+    clock = FakeClock()
+    cached = CachedPrefilter(lambda: next(vocabularies), ttl=60, clock=clock)
+    assert cached.get().vocabulary == ['Dog']
+    clock.now = 60
+    assert cached.get().vocabulary == ['Dog', 'Cat']
+
+
+def test_cached_prefilter_invalidate_forces_reload():
+    vocabularies = iter([['Dog'], ['Cat']])
+    cached = CachedPrefilter(lambda: next(vocabularies), ttl=60, clock=FakeClock())
+    assert cached.get().vocabulary == ['Dog']
+    cached.invalidate()
+    assert cached.get().vocabulary == ['Cat']
@@ -2,21 +2,22 @@ import React, { useEffect, useState } from 'react';
 import './App.css';
 import Header from './components/Header';
 import Sidebar from './components/Sidebar';
-import Gallery from './components/Gallery';
 import TemplatePage from './components/TemplatePage';
 import ImageDetail from './components/ImageDetail';
 import UploadModal from './components/UploadModal';
-import { searchImages, uploadImage, deepSearch as deepSearchAPI, getTabs, addTab, type Tab } from './api/api';
-import { type Photo } from './types/types';
+import { uploadImage, deepSearch as deepSearchAPI, getTabs, addTab, searchFeed, tagFeed, tabFeed, type Tab } from './api/api';
+import { type Photo, type PhotoFeed } from './types/types';
+
+// Wait for typing to pause before restarting the search feed
+const SEARCH_DEBOUNCE_MS = 250;
 
 function App() {
   const [selectedPhoto, setSelectedPhoto] = useState<Photo | null>(null);
   const [showUploadModal, setShowUploadModal] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
   const [deepSearch, setDeepSearch] = useState(false);
-  const [tags, setTags] = useState<string[]>([]);
-  const [photos, setPhotos] = useState<Photo[]>([]);
-  const [loading, setLoading] = useState(true);
+  const [feed, setFeed] = useState<PhotoFeed>(() => searchFeed(''));
+  const [loading, setLoading] = useState(false);
   const [activeTab, setActiveTab] = useState('All Photos');
   const [tabs, setTabs] = useState<Tab[]>([]);
   const [tabsLoading, setTabsLoading] = useState(true);
@@ -32,17 +33,21 @@ function App() {
   const handleSearch = (query: string, deepSearch: boolean) => {
     setSearchQuery(query);
     setDeepSearch(deepSearch);
-    // TODO: Implement actual search API call
   };
 
   const handleDeepSearch = async (query: string) => {
-    const tagData = await deepSearchAPI(query);
-    console.log("deep query: ", query);
-    console.log("imageData: ", tagData);
-    //setPhotos(imageData);
-    setLoading(false);
-    const tagList = tagData.map((tag) => tag.tag.toLowerCase());
-    setTags(tagList);
+    setLoading(true);
+    try {
+      const tagData = await deepSearchAPI(query);
+      console.log("deep query: ", query);
+      console.log("imageData: ", tagData);
+      const tagList = tagData.map((tag) => tag.tag.toLowerCase());
+      setFeed(tagFeed(tagList));
+    } catch (error) {
+      console.error('Deep search failed:', error);
+    } finally {
+      setLoading(false);
+    }
   }
 
   // Fetch tabs on component mount
@@ -62,21 +67,14 @@ function App() {
   }, []);
 
   useEffect(() => {
-    (async() => {
-      console.log(deepSearch)
-      if (deepSearch) {
-        console.log("deep search ,ignored ");
-      }
-      else {
-        setTags([]);
-        setLoading(true);
-        const imageData = await searchImages('');
-        console.log(imageData);
-        setPhotos(imageData);
-        setLoading(false);
-      }
-      
-    })();
+    if (deepSearch) {
+      // Deep search runs on demand via handleDeepSearch
+      return;
+    }
+    const timer = setTimeout(() => {
+      setFeed((current) => current.key === searchFeed(searchQuery).key ? current : searchFeed(searchQuery));
+    }, SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
   }, [searchQuery, deepSearch])
 
   const handleTabChange = async (tabName: string) => {
@@ -86,30 +84,25 @@ function App() {
     // If "All Photos" tab, show all photos without filtering
     if (tabName === 'All Photos') {
       setDeepSearch(false);
-      setTags([]);
-      setLoading(true);
-      try {
-        const imageData = await searchImages('');
-        setPhotos(imageData);
-      } catch (error) {
-        console.error('Failed to load all photos:', error);
-      } finally {
-        setLoading(false);
-      }
+      setFeed(searchFeed(''));
     } else {
-      // For all other tabs, perform deep search using tab name
       setDeepSearch(true);
+      // Prefer the tab's precomputed image list (the feed falls back to deep search while it builds)
+      const tab = tabs.find((t) => t.tab_name === tabName);
+      if (tab) {
+        setFeed(tabFeed(tab.tab_id, tabName));
+        return;
+      }
+
       setLoading(true);
       try {
+        // Not a saved tab, deep search using tab name
         const tagData = await deepSearchAPI(tabName);
-        console.log("Tab deep search for:", tabName);
-        console.log("Tag data:", tagData);
         const tagList = tagData.map((tag) => tag.tag.toLowerCase());
-        setTags(tagList);
-        console.log("Tag list:", tagList);
+        setFeed(tagFeed(tagList));
       } catch (error) {
-        console.error('Failed to perform tab deep search:', error);
-        setTags([]);
+        console.error('Failed to load tab photos:', error);
+        setFeed(tagFeed([]));
       } finally {
         setLoading(false);
       }
@@ -138,9 +131,8 @@ function App() {
       
       console.log('All uploads completed:', responses);
       
-      // Refetch gallery data after successful uploads
-      const imageData = await searchImages(searchQuery);
-      setPhotos(imageData);
+      // Restart the current feed so the new photos show up
+      setFeed((current) => current.renew());
     } catch (error) {
       console.error('Upload failed:', error);
     } finally {
@@ -169,11 +161,9 @@ function App() {
         <main className="main-content">
           <TemplatePage 
             title={activeTab}
-            photos={photos}
-            tags={tags}
+            feed={feed}
             onPhotoClick={handlePhotoClick}
             searchQuery={searchQuery}
-            deepSearch={deepSearch}
             loading={loading}
           />
         </main>
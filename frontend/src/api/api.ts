@@ -1,49 +1,185 @@
-import { Photo, Tag } from "../types/types";
+import { PhotoFeed, PhotoPage, Tag } from "../types/types";
 
 const API_BASE_URL = 'http://localhost:5000';
 
+// Number of multipart parts sent to S3 at the same time
+const UPLOAD_PART_CONCURRENCY = 4;
+const JOB_POLL_INTERVAL_MS = 1000;
+
+interface UploadSession {
+  session_id: string;
+  image_id: string;
+  method: 'PUT' | 'MULTIPART';
+  url?: string;
+  part_size?: number;
+  parts?: { part_number: number, url: string }[];
+}
+
+export interface Job {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  progress: number;
+  total: number | null;
+  result: any;
+  error: string | null;
+}
+
+export async function getJob(jobId: string): Promise<Job> {
+  const response = await fetch(API_BASE_URL + `/api/jobs/${jobId}`, {
+    method: 'GET'
+  });
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({}));
+    throw new Error(error.error || 'Failed to fetch job');
+  }
+  const res = await response.json();
+  return res.job;
+}
+
+// Polls a background job until it finishes.
+export async function waitForJob(jobId: string): Promise<Job> {
+  for (;;) {
+    const job = await getJob(jobId);
+    if (job.status === 'completed') return job;
+    if (job.status === 'failed') throw new Error(job.error || 'Background job failed');
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+}
+
+export interface UploadStatus {
+  image_id: string;
+  status: 'pending' | 'ingesting' | 'completed' | 'failed';
+  error: string | null;
+}
+
+// Polls an upload session until its image is indexed. Session state lives in DynamoDB,
+// so this works whichever backend worker answers (unlike waitForJob).
+export async function waitForUpload(sessionId: string): Promise<UploadStatus> {
+  for (;;) {
+    const response = await fetch(API_BASE_URL + `/api/uploads/${sessionId}`, {
+      method: 'GET'
+    });
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({}));
+      throw new Error(error.error || 'Failed to fetch upload status');
+    }
+    const upload: UploadStatus = await response.json();
+    if (upload.status === 'completed') return upload;
+    if (upload.status === 'failed') throw new Error(upload.error || 'Failed to process image');
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+}
+
+async function putToS3(url: string, body: Blob, contentType?: string): Promise<string> {
+  const response = await fetch(url, {
+    method: 'PUT',
+    headers: contentType ? { 'Content-Type': contentType } : undefined,
+    body,
+  });
+  if (!response.ok) {
+    throw new Error(`Upload to storage failed (${response.status})`);
+  }
+  // The bucket's CORS config must expose ETag for multipart completion
+  return response.headers.get('ETag') || '';
+}
+
+async function uploadParts(file: File, session: UploadSession): Promise<{ part_number: number, etag: string }[]> {
+  const parts = session.parts || [];
+  const partSize = session.part_size || file.size;
+  const results: { part_number: number, etag: string }[] = [];
+  let next = 0;
+
+  const worker = async () => {
+    while (next < parts.length) {
+      const part = parts[next++];
+      const start = (part.part_number - 1) * partSize;
+      const etag = await putToS3(part.url, file.slice(start, start + partSize));
+      results.push({ part_number: part.part_number, etag });
+    }
+  };
+
+  await Promise.all(Array.from({ length: Math.min(UPLOAD_PART_CONCURRENCY, parts.length) }, worker));
+  return results;
+}
+
 /**
- * Uploads an image file to the backend /api/upload endpoint.
+ * Uploads an image file straight to S3 through a presigned upload session,
+ * then waits for the backend to label and index it.
  * @param file The image file to upload.
- * @returns A promise resolving to the backend response JSON.
+ * @returns A promise resolving to the completed upload's status.
  */
 export async function uploadImage(file: File): Promise<any> {
-  const formData = new FormData();
-  formData.append('image', file);
+  const sessionResponse = await fetch(API_BASE_URL + '/api/uploads', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ filename: file.name, content_type: file.type, size: file.size }),
+  });
+
+  if (!sessionResponse.ok) {
+    const error = await sessionResponse.json().catch(() => ({}));
+    throw new Error(error.error || 'Failed to upload image');
+  }
 
-  const response = await fetch(API_BASE_URL + '/api/upload', {
+  const session: UploadSession = await sessionResponse.json();
+  let parts: { part_number: number, etag: string }[] | undefined;
+  if (session.method === 'PUT' && session.url) {
+    await putToS3(session.url, file, file.type);
+  } else {
+    parts = await uploadParts(file, session);
+  }
+
+  const completeResponse = await fetch(API_BASE_URL + `/api/uploads/${session.session_id}/complete`, {
     method: 'POST',
-    body: formData,
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ parts }),
   });
 
-  if (!response.ok) {
-    const error = await response.json().catch(() => ({}));
+  if (!completeResponse.ok) {
+    const error = await completeResponse.json().catch(() => ({}));
     throw new Error(error.error || 'Failed to upload image');
   }
 
-  return response.json();
+  return waitForUpload(session.session_id);
 }
 
-// Searches for images. If query is empty, returns all images.
-export async function searchImages(query: string): Promise<Photo[]> {
-  const params = new URLSearchParams({
-    query
-  })
-  const response = await fetch(API_BASE_URL + `/api/search${query ? `?${params.toString()}` : ``}`, {
+/**
+ * Fetches one newest-first page of images from /api/search.
+ * @param filter Either a tag substring `query` or a set of `tags` (as chosen by deep search).
+ * @param cursor Cursor returned with the previous page, or null for the first page.
+ * @param limit Page size.
+ */
+export async function searchImagesPage(
+  filter: { query?: string, tags?: string[] },
+  cursor: string | null,
+  limit: number
+): Promise<PhotoPage> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (filter.query) {
+    params.set('query', filter.query);
+  }
+  if (filter.tags && filter.tags.length) {
+    params.set('tags', filter.tags.join(','));
+  }
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  const response = await fetch(API_BASE_URL + `/api/search?${params.toString()}`, {
     method: 'GET'
   });
   if (!response.ok) {
     const error = await response.json().catch(() => ({}));
-    throw new Error(error.error || 'Failed to upload image');
+    throw new Error(error.error || 'Failed to search images');
   }
 
-  const res: Photo[] = await response.json();
-  return res.map((photo: Photo) => {
-    return {
-      ...photo,
-      dateModified: new Date(parseFloat(photo.dateModified) * 1000).toLocaleDateString(),
-    }
-  })
+  const res = await response.json();
+  return {
+    photos: res.images,
+    nextCursor: res.next_cursor,
+  };
 }
 
 export async function deepSearch(query: string): Promise<{ tag: string, confidence: string }[]> {
@@ -64,10 +200,75 @@ export async function deepSearch(query: string): Promise<{ tag: string, confiden
   return JSON.parse(res.results);
 }
 
+export interface ImageDetails {
+  image_id: string;
+  filename: string;
+  url: string;
+  thumbnail_url: string;
+  labels: string[];
+  tags: Tag[];
+  upload_date: string;
+  capture_time: string | null;
+  detailed_description: string | null;
+  file_size: number | null;
+  dimensions: string | null;
+  format: string | null;
+  camera: string | null;
+  location: { lat: number, lon: number } | null;
+}
+
+// One photo's stored details; describe=true also asks for the (cached) Claude description
+export async function getImageDetails(imageId: string, describe: boolean = false): Promise<ImageDetails> {
+  const params = new URLSearchParams(describe ? { describe: 'true' } : {});
+  const response = await fetch(API_BASE_URL + `/api/image/${encodeURIComponent(imageId)}?${params.toString()}`, {
+    method: 'GET'
+  });
+
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({}));
+    throw new Error(error.error || 'Failed to fetch image details');
+  }
+
+  const res = await response.json();
+  return res.image_details;
+}
+
 export interface Tab {
   user_id: string;
   tab_id: string;
   tab_name: string;
+  view_status?: 'pending' | 'ready' | 'empty' | 'failed';
+}
+
+export interface TabImagesPage extends PhotoPage {
+  status: 'pending' | 'ready' | 'empty';
+  tags: string[];
+  totalCount: number;
+}
+
+// Reads one page of a tab's precomputed image list.
+export async function getTabImages(tabId: string, cursor?: string | null, limit: number = 100): Promise<TabImagesPage> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  const response = await fetch(API_BASE_URL + `/api/tabs/${encodeURIComponent(tabId)}/images?${params.toString()}`, {
+    method: 'GET'
+  });
+
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({}));
+    throw new Error(error.error || 'Failed to fetch tab images');
+  }
+
+  const res = await response.json();
+  return {
+    status: res.status,
+    tags: res.tags || [],
+    totalCount: res.total_count || 0,
+    nextCursor: res.next_cursor,
+    photos: res.images,
+  };
 }
 
 export async function getTabs(): Promise<Tab[]> {
@@ -101,3 +302,48 @@ export async function addTab(tabName: string): Promise<Tab> {
   const res = await response.json();
   return res.tab;
 }
+
+// Feeds consumed by the virtualized gallery. Each call returns a new feed, which restarts pagination.
+
+export function searchFeed(query: string): PhotoFeed {
+  return {
+    key: `search:${query}`,
+    fetchPage: (cursor, limit) => searchImagesPage({ query }, cursor, limit),
+    renew: () => searchFeed(query),
+  };
+}
+
+export function tagFeed(tags: string[]): PhotoFeed {
+  return {
+    key: `tags:${tags.join(',')}`,
+    fetchPage: (cursor, limit) => searchImagesPage({ tags }, cursor, limit),
+    renew: () => tagFeed(tags),
+  };
+}
+
+// A tab's precomputed view. While the view is (re)building the backend returns no images,
+// so the feed switches to a deep search on the tab name for the rest of its pages.
+export function tabFeed(tabId: string, tabName: string): PhotoFeed {
+  let fallback: PhotoFeed | null = null;
+  return {
+    key: `tab:${tabId}`,
+    // A fresh feed checks the view status again instead of keeping an earlier fallback
+    renew: () => tabFeed(tabId, tabName),
+    fetchPage: async (cursor, limit) => {
+      if (fallback) {
+        return fallback.fetchPage(cursor, limit);
+      }
+      const page = await getTabImages(tabId, cursor, limit);
+      if (page.status === 'ready') {
+        return page;
+      }
+      if (cursor !== null) {
+        // The view started rebuilding mid-scroll; stop here rather than mix in other results
+        return { photos: [], nextCursor: null };
+      }
+      const tagData = await deepSearch(tabName);
+      fallback = tagFeed(tagData.map((tag) => tag.tag.toLowerCase()));
+      return fallback.fetchPage(null, limit);
+    },
+  };
+}
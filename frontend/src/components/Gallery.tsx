@@ -1,68 +1,95 @@
-import React, { useEffect, useMemo, useState } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
 import './Gallery.css';
 import { Photo, Tag } from '../types/types';
 
 interface GalleryProps {
-  photos: Photo[];
+  count: number;
+  done: boolean;
+  getPhoto: (index: number) => Photo | undefined;
+  ensureRange: (start: number, end: number) => void;
+  version: number;
   onPhotoClick: (photo: Photo) => void;
   searchQuery: string;
-  deepSearch: boolean;
   loading?: boolean;
-  tags: string[];
 }
 
-const Gallery: React.FC<GalleryProps> = ({ photos, onPhotoClick, searchQuery, loading, tags, deepSearch }) => {
-  const [mockPhotos, setMockPhotos] = useState<Photo[]>([]);
-  const [matches, setMatches] = useState<Record<string, string>>({});
-
-  // Filter photos based on search query and tags
-  const filteredPhotos = useMemo(() => {
-    const newMatches: Record<string, string> = {};
-    
-    // If we have tags from deep search (tab filtering), filter by tags
-    if (tags.length) {
-      console.log("Filtering by tags:", tags);
-      const result = photos
-        .filter((photo: Photo) => {
-          return photo.tags.some((tag: Tag) => {
-            console.log("Checking photo tag:", tag.name.toLowerCase());
-            if (tags.some((testTag: any) => testTag.toLowerCase().includes(tag.name.toLowerCase()))) {
-              newMatches[photo.id] = tag.name.toLowerCase();
-              console.log("-- MATCHED --");
-              return true;
-            }
-            return false;
-          });
-        })
-        .map((photo: Photo) => ({ 
-          ...photo, 
-          tags: photo.tags.map((t: Tag) => ({ ...t, name: t.name.toLowerCase() }))
-        }));
-      setMatches(newMatches);
-      return result;
-    }
-    const result = photos
-      .filter((photo: Photo) => {
-        if (!searchQuery) {
-          setMatches(newMatches);
-          return true;
-        }
-        const query = searchQuery.toLowerCase();
-        return photo.tags.some((tag: Tag) => {
-          if (tag.name.toLowerCase().includes(query)) {
-            newMatches[photo.id] = tag.name.toLowerCase();
-            return true;
-          }
-          return false;
-        });
-      })
-      .map((photo: Photo) => ({ 
-        ...photo, 
-        tags: photo.tags.map((t: Tag) => ({ ...t, name: t.name.toLowerCase() }))
-      }))
-    setMatches(newMatches);
-    return result;
-  }, [photos, searchQuery, tags]);
+// Keep in sync with .photo-card / .photo-grid sizes in Gallery.css
+const CARD_HEIGHT = 270;
+const OVERSCAN_ROWS = 3;
+
+// One formatter for every tile; dates are only formatted for tiles actually rendered
+const dateFormatter = new Intl.DateTimeFormat();
+const formatDate = (dateModified: string) => {
+  const seconds = parseFloat(dateModified);
+  return isNaN(seconds) ? dateModified : dateFormatter.format(new Date(seconds * 1000));
+};
+
+const gridMetrics = (width: number) => {
+  const viewport = window.innerWidth;
+  const gap = viewport <= 768 ? 16 : 24;
+  const minTileWidth = viewport <= 480 ? width : viewport <= 768 ? 250 : 280;
+  const columns = Math.max(1, Math.floor((width + gap) / (minTileWidth + gap)));
+  return { columns, gap, rowStride: CARD_HEIGHT + gap };
+};
+
+const PhotoLabels = ({ photo } : { photo: Photo }) => (
+  <div className="photo-labels">
+    {photo.tags.slice(0, 3).map((tag: Tag, index) => (
+      <span key={index} className="label-tag">
+        {tag.name.toLowerCase()}
+      </span>
+    ))}
+    {photo.tags.length > 3 && (
+      <span className="label-tag more">
+        +{photo.tags.length - 3}
+      </span>
+    )}
+  </div>
+);
+
+const Gallery: React.FC<GalleryProps> = ({ count, done, getPhoto, ensureRange, version, onPhotoClick, searchQuery, loading }) => {
+  const gridRef = useRef<HTMLDivElement>(null);
+  const [width, setWidth] = useState(0);
+  const [scrollOffset, setScrollOffset] = useState(0);
+  const [viewportHeight, setViewportHeight] = useState(window.innerHeight);
+
+  // Track how far the page has scrolled past the top of the grid
+  const measure = useCallback(() => {
+    const grid = gridRef.current;
+    if (!grid) return;
+    const rect = grid.getBoundingClientRect();
+    setWidth(rect.width);
+    setScrollOffset(Math.max(0, -rect.top));
+    setViewportHeight(window.innerHeight);
+  }, []);
+
+  useEffect(() => {
+    let frame = 0;
+    const onChange = () => {
+      cancelAnimationFrame(frame);
+      frame = requestAnimationFrame(measure);
+    };
+    measure();
+    window.addEventListener('scroll', onChange, { passive: true });
+    window.addEventListener('resize', onChange);
+    return () => {
+      cancelAnimationFrame(frame);
+      window.removeEventListener('scroll', onChange);
+      window.removeEventListener('resize', onChange);
+    };
+  }, [measure, loading]);
+
+  const { columns, gap, rowStride } = gridMetrics(width);
+  // One extra placeholder row while more pages remain
+  const rowCount = Math.ceil(count / columns) + (done ? 0 : 1);
+  const firstRow = Math.max(0, Math.floor(scrollOffset / rowStride) - OVERSCAN_ROWS);
+  const lastRow = Math.min(rowCount - 1, Math.ceil((scrollOffset + viewportHeight) / rowStride) + OVERSCAN_ROWS);
+  const firstIndex = firstRow * columns;
+  const lastIndex = (lastRow + 1) * columns - 1;
+
+  useEffect(() => {
+    ensureRange(firstIndex, lastIndex);
+  }, [ensureRange, firstIndex, lastIndex, version]);
 
   if (loading) {
     return (
@@ -73,7 +100,7 @@ const Gallery: React.FC<GalleryProps> = ({ photos, onPhotoClick, searchQuery, lo
     );
   }
 
-  if (filteredPhotos?.length === 0) {
+  if (count === 0 && done) {
     return (
       <div className="gallery-empty">
         <svg className="empty-icon" width="64" height="64" viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="1">
@@ -83,7 +110,7 @@ const Gallery: React.FC<GalleryProps> = ({ photos, onPhotoClick, searchQuery, lo
         </svg>
         <h3>No photos found</h3>
         <p>
-          {searchQuery 
+          {searchQuery
             ? `No photos match "${searchQuery}". Try a different search term.`
             : 'Upload some photos to get started!'
           }
@@ -92,33 +119,39 @@ const Gallery: React.FC<GalleryProps> = ({ photos, onPhotoClick, searchQuery, lo
     );
   }
 
-  const PhotoLabels = ({ photo } : { photo: Photo }) => (
-    <div className="photo-labels">
-      {photo.tags.slice(0, 3).map((tag, index) => (
-        <span key={index} className="label-tag">
-          {tag.name}
-        </span>
-      ))}
-      {photo.tags.length > 3 && (
-        <span className="label-tag more">
-          +{photo.tags.length - 3}
-        </span>
-      )}
-    </div>
-  );
-
-  const PhotoLabelsWithSearch = ({ photo }: { photo: Photo }) => (
-    <div className="photo-labels">
-      <span className="label-tag">
-          {matches[photo.id]}
-      </span>
-      {photo.tags.length > 1 && (
-        <span className="label-tag more">
-          +{photo.tags.length - 1}
-        </span>
-      )}
-    </div>
-  )
+  const tiles: React.ReactNode[] = [];
+  for (let index = firstIndex; index <= Math.min(lastIndex, count - 1); index++) {
+    const photo = getPhoto(index);
+    if (!photo) {
+      tiles.push(<div key={`placeholder-${index}`} className="photo-card placeholder" />);
+      continue;
+    }
+    tiles.push(
+      <div
+        key={photo.id}
+        className="photo-card"
+        onClick={() => onPhotoClick(photo)}
+      >
+        <div className="photo-thumbnail">
+          <img
+            src={photo.thumbnailUrl || photo.s3Url}
+            alt={photo.filename}
+            loading="lazy"
+            decoding="async"
+          />
+          <div className="photo-overlay">
+            <PhotoLabels photo={photo}/>
+          </div>
+        </div>
+        <div className="photo-info">
+          <p className="photo-filename">{photo.filename || "No name found"}</p>
+          <p className="photo-date">
+            {formatDate(photo.dateModified)}
+          </p>
+        </div>
+      </div>
+    );
+  }
 
   return (
     <div className="gallery">
@@ -126,34 +159,24 @@ const Gallery: React.FC<GalleryProps> = ({ photos, onPhotoClick, searchQuery, lo
         <h2>
           {searchQuery ? `Search results for "${searchQuery}"` : 'All Photos'}
         </h2>
-        <span className="photo-count">{filteredPhotos.length} photos</span>
+        <span className="photo-count">{count}{done ? '' : '+'} photos</span>
       </div>
-      
-      <div className="photo-grid">
-        {filteredPhotos?.map((photo) => (
-          <div 
-            key={photo.filename} 
-            className="photo-card"
-            onClick={() => onPhotoClick(photo)}
-          >
-            <div className="photo-thumbnail">
-              <img 
-                src={photo.s3Url/*photo.thumbnailUrl */} 
-                alt={photo.filename}
-                loading="lazy"
-              />
-              <div className="photo-overlay">
-                <PhotoLabels photo={photo}/>
-              </div>
-            </div>
-            <div className="photo-info">
-              <p className="photo-filename">{photo.filename || "No name found"}</p>
-              <p className="photo-date">
-                {photo.dateModified}
-              </p>
-            </div>
-          </div>
-        ))}
+
+      <div
+        ref={gridRef}
+        className="photo-grid-window"
+        style={{ height: Math.max(0, rowCount * rowStride - gap) }}
+      >
+        <div
+          className="photo-grid"
+          style={{
+            gridTemplateColumns: `repeat(${columns}, 1fr)`,
+            gap,
+            transform: `translateY(${firstRow * rowStride}px)`,
+          }}
+        >
+          {tiles}
+        </div>
       </div>
     </div>
   );
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Photo } from '../types/types';
+import { getImageDetails, ImageDetails } from '../api/api';
 import './ImageDetail.css';
 
 interface ImageDetailProps {
@@ -7,32 +8,46 @@ interface ImageDetailProps {
   onClose: () => void;
 }
 
+const formatFileSize = (bytes: number | null) => {
+  if (!bytes) return 'Unknown';
+  if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(0)} KB`;
+  return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+};
+
 const ImageDetail: React.FC<ImageDetailProps> = ({ photo, onClose }) => {
-  const [imageDetails, setImageDetails] = useState<any>(null);
+  const [imageDetails, setImageDetails] = useState<ImageDetails | null>(null);
   const [loading, setLoading] = useState(true);
+  const [describing, setDescribing] = useState(false);
 
   useEffect(() => {
-    // Mock detailed image information
-    const mockDetails = {
-      detailed_description: `This is a beautiful ${photo.tags[0].name} photograph captured with excellent composition and lighting. The image showcases ${photo.tags.map((tag) => tag.name).slice(0, 3).join(', ')} with remarkable clarity and artistic vision. The photographer has skillfully balanced the elements to create a visually compelling scene that draws the viewer's attention and evokes a strong emotional response.`,
-      file_size: '2.4 MB',
-      dimensions: '1920x1080',
-      camera: 'FaceTime HD camera',
-      settings: {
-        aperture: 'f/2.8',
-        shutter: '1/250s',
-        iso: 'ISO 400',
-        focal_length: '85mm'
-      },
-      location: 'Waterloo, ON',
-      confidence_score: 0.92
-    };
+    let cancelled = false;
+    setImageDetails(null);
+    setLoading(true);
+
+    // Stored details come back from a single read; the description may need a Claude call
+    // the first time, so it is requested separately and fills in when ready
+    getImageDetails(photo.id)
+      .then(async (details) => {
+        if (cancelled) return;
+        setImageDetails(details);
+        setLoading(false);
+        if (!details.detailed_description) {
+          setDescribing(true);
+          const described = await getImageDetails(photo.id, true);
+          if (!cancelled) setImageDetails(described);
+        }
+      })
+      .catch((err) => console.error('Failed to load image details:', err))
+      .finally(() => {
+        if (!cancelled) {
+          setLoading(false);
+          setDescribing(false);
+        }
+      });
 
-    // Simulate API call delay
-    setTimeout(() => {
-      setImageDetails(mockDetails);
-      setLoading(false);
-    }, 800);
+    return () => {
+      cancelled = true;
+    };
   }, [photo]);
 
   const handleBackdropClick = (e: React.MouseEvent) => {
@@ -64,7 +79,7 @@ const ImageDetail: React.FC<ImageDetailProps> = ({ photo, onClose }) => {
             <div className="image-header">
               <h2 className="image-title">{photo.filename}</h2>
               <p className="upload-date">
-                Uploaded {new Date(photo.dateModified).toLocaleDateString('en-US', {
+                Uploaded {new Date(parseFloat(photo.dateModified) * 1000).toLocaleDateString('en-US', {
                   year: 'numeric',
                   month: 'long',
                   day: 'numeric'
@@ -86,16 +101,22 @@ const ImageDetail: React.FC<ImageDetailProps> = ({ photo, onClose }) => {
             {loading ? (
               <div className="loading-details">
                 <div className="loading-spinner-small"></div>
-                <p>Analyzing image details...</p>
+                <p>Loading image details...</p>
               </div>
-            ) : (
+            ) : imageDetails && (
               <>
                 <div className="description-section">
                   <h3>AI Description</h3>
-                  <p className="ai-description">{imageDetails.detailed_description}</p>
-                  <div className="confidence-score">
-                    <span>Confidence: {Math.round(imageDetails.confidence_score * 100)}%</span>
-                  </div>
+                  {imageDetails.detailed_description ? (
+                    <p className="ai-description">{imageDetails.detailed_description}</p>
+                  ) : describing ? (
+                    <div className="loading-details">
+                      <div className="loading-spinner-small"></div>
+                      <p>Analyzing image details...</p>
+                    </div>
+                  ) : (
+                    <p className="ai-description">No description available.</p>
+                  )}
                 </div>
 
                 <div className="metadata-section">
@@ -103,42 +124,36 @@ const ImageDetail: React.FC<ImageDetailProps> = ({ photo, onClose }) => {
                   <div className="metadata-grid">
                     <div className="metadata-item">
                       <span className="metadata-label">File Size</span>
-                      <span className="metadata-value">{imageDetails.file_size}</span>
+                      <span className="metadata-value">{formatFileSize(imageDetails.file_size)}</span>
                     </div>
                     <div className="metadata-item">
                       <span className="metadata-label">Dimensions</span>
-                      <span className="metadata-value">{imageDetails.dimensions}</span>
+                      <span className="metadata-value">{imageDetails.dimensions || 'Unknown'}</span>
                     </div>
                     <div className="metadata-item">
                       <span className="metadata-label">Camera</span>
-                      <span className="metadata-value">{imageDetails.camera}</span>
+                      <span className="metadata-value">{imageDetails.camera || 'Unknown'}</span>
                     </div>
                     <div className="metadata-item">
                       <span className="metadata-label">Location</span>
-                      <span className="metadata-value">{imageDetails.location}</span>
-                    </div>
-                  </div>
-                </div>
-
-                <div className="camera-settings">
-                  <h3>Camera Settings</h3>
-                  <div className="settings-grid">
-                    <div className="setting-item">
-                      <span className="setting-label">Aperture</span>
-                      <span className="setting-value">{imageDetails.settings.aperture}</span>
-                    </div>
-                    <div className="setting-item">
-                      <span className="setting-label">Shutter</span>
-                      <span className="setting-value">{imageDetails.settings.shutter}</span>
-                    </div>
-                    <div className="setting-item">
-                      <span className="setting-label">ISO</span>
-                      <span className="setting-value">{imageDetails.settings.iso}</span>
-                    </div>
-                    <div className="setting-item">
-                      <span className="setting-label">Focal Length</span>
-                      <span className="setting-value">{imageDetails.settings.focal_length}</span>
+                      <span className="metadata-value">
+                        {imageDetails.location
+                          ? `${imageDetails.location.lat.toFixed(4)}, ${imageDetails.location.lon.toFixed(4)}`
+                          : 'Unknown'}
+                      </span>
                     </div>
+                    {imageDetails.capture_time && (
+                      <div className="metadata-item">
+                        <span className="metadata-label">Captured</span>
+                        <span className="metadata-value">
+                          {new Date(imageDetails.capture_time).toLocaleDateString('en-US', {
+                            year: 'numeric',
+                            month: 'long',
+                            day: 'numeric'
+                          })}
+                        </span>
+                      </div>
+                    )}
                   </div>
                 </div>
               </>
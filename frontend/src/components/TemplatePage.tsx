@@ -1,44 +1,45 @@
 import React from 'react';
 import Gallery from './Gallery';
-import { Photo } from '../types/types';
+import { Photo, PhotoFeed } from '../types/types';
+import { usePagedPhotos } from '../hooks/usePagedPhotos';
 import './TemplatePage.css';
 
 interface TemplatePageProps {
   title: string;
-  photos: Photo[];
+  feed: PhotoFeed;
   onPhotoClick: (photo: Photo) => void;
   searchQuery: string;
-  deepSearch: boolean;
   loading?: boolean;
-  tags: string[];
 }
 
 const TemplatePage: React.FC<TemplatePageProps> = ({ 
   title, 
-  photos, 
+  feed, 
   onPhotoClick, 
   searchQuery, 
-  deepSearch, 
-  loading, 
-  tags 
+  loading 
 }) => {
+  const { count, done, loading: pageLoading, getPhoto, ensureRange, version } = usePagedPhotos(feed);
+
   return (
     <div className="template-page">
       <div className="template-header">
         <h2 className="template-title">
           {title}
         </h2>
-        <span className="photo-count">{photos.length} photos</span>
+        <span className="photo-count">{count}{done ? '' : '+'} photos</span>
       </div>
       
       <div className="template-content">
         <Gallery 
-          photos={photos}
+          count={count}
+          done={done}
+          getPhoto={getPhoto}
+          ensureRange={ensureRange}
+          version={version}
           onPhotoClick={onPhotoClick}
           searchQuery={searchQuery}
-          deepSearch={deepSearch}
-          loading={loading}
-          tags={tags}
+          loading={loading || pageLoading}
         />
       </div>
     </div>
@@ -0,0 +1,136 @@
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react';
+import { Photo, PhotoFeed } from '../types/types';
+
+const DEFAULT_PAGE_SIZE = 60;
+const DEFAULT_MAX_CACHED_PAGES = 20;
+
+interface FeedState {
+  // cursors[i] is the cursor that fetches page i; page 0 starts with null
+  cursors: (string | null)[];
+  // lengths[i] is known once page i has been fetched at least once
+  lengths: number[];
+  done: boolean;
+  inflight: Set<number>;
+}
+
+const emptyState = (): FeedState => ({
+  cursors: [null],
+  lengths: [],
+  done: false,
+  inflight: new Set<number>(),
+});
+
+/**
+ * Loads a cursor-paginated photo feed on demand. Only the most recently used
+ * pages are kept in memory; evicted pages are refetched from their cursor when
+ * they scroll back into view.
+ */
+export function usePagedPhotos(
+  feed: PhotoFeed,
+  pageSize: number = DEFAULT_PAGE_SIZE,
+  maxCachedPages: number = DEFAULT_MAX_CACHED_PAGES,
+) {
+  const stateRef = useRef<FeedState>(emptyState());
+  const cacheRef = useRef(new Map<number, Photo[]>());
+  const [version, setVersion] = useState(0);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
+
+  const loadPage = useCallback(async (pageIndex: number) => {
+    const state = stateRef.current;
+    if (pageIndex >= state.cursors.length || state.inflight.has(pageIndex) || cacheRef.current.has(pageIndex)) {
+      return;
+    }
+
+    state.inflight.add(pageIndex);
+    try {
+      const page = await feed.fetchPage(state.cursors[pageIndex], pageSize);
+      if (stateRef.current !== state) return; // feed changed while loading
+
+      const cache = cacheRef.current;
+      cache.set(pageIndex, page.photos);
+      while (cache.size > maxCachedPages) {
+        // Map iteration order is insertion order, so the first key is least recently used
+        cache.delete(cache.keys().next().value as number);
+      }
+
+      state.lengths[pageIndex] = page.photos.length;
+      if (pageIndex === state.cursors.length - 1) {
+        if (page.nextCursor) {
+          state.cursors.push(page.nextCursor);
+        } else {
+          state.done = true;
+        }
+      }
+      setVersion((v) => v + 1);
+    } catch (err) {
+      if (stateRef.current === state) {
+        console.error('Failed to load photos page:', err);
+        setError(err instanceof Error ? err.message : 'Failed to load photos');
+        state.done = true;
+      }
+    } finally {
+      state.inflight.delete(pageIndex);
+      if (pageIndex === 0 && stateRef.current === state) {
+        setLoading(false);
+      }
+    }
+  }, [feed, pageSize, maxCachedPages]);
+
+  // Start over whenever the feed changes
+  useEffect(() => {
+    stateRef.current = emptyState();
+    cacheRef.current = new Map<number, Photo[]>();
+    setError(null);
+    setLoading(true);
+    setVersion((v) => v + 1);
+    loadPage(0);
+  }, [feed, loadPage]);
+
+  // offsets[i] is the index of the first photo on page i
+  const offsets = useMemo(() => {
+    const result = [0];
+    stateRef.current.lengths.forEach((length) => result.push(result[result.length - 1] + length));
+    return result;
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [version]);
+
+  const count = offsets[offsets.length - 1];
+  const done = stateRef.current.done;
+
+  const pageOf = useCallback((index: number) => {
+    let page = 0;
+    while (page + 1 < offsets.length && offsets[page + 1] <= index) {
+      page++;
+    }
+    return page;
+  }, [offsets]);
+
+  const getPhoto = useCallback((index: number): Photo | undefined => {
+    const page = pageOf(index);
+    const photos = cacheRef.current.get(page);
+    return photos ? photos[index - offsets[page]] : undefined;
+  }, [offsets, pageOf]);
+
+  /** Make sure photos [start, end] are loaded, fetching the next page when close to the end. */
+  const ensureRange = useCallback((start: number, end: number) => {
+    const state = stateRef.current;
+    const cache = cacheRef.current;
+    const lastPage = Math.min(pageOf(Math.max(end, 0)), state.lengths.length - 1);
+    for (let page = pageOf(Math.max(start, 0)); page <= lastPage; page++) {
+      const photos = cache.get(page);
+      if (photos) {
+        // Touch the page so it counts as recently used
+        cache.delete(page);
+        cache.set(page, photos);
+      } else {
+        loadPage(page);
+      }
+    }
+    if (!state.done && end >= count - pageSize / 2) {
+      loadPage(state.cursors.length - 1);
+    }
+  }, [count, pageOf, pageSize, loadPage]);
+
+  return { count, done, loading, error, getPhoto, ensureRange, version };
+}
@@ -10,9 +10,24 @@ export type Photo = {
     tags: Tag[];
     userId: string;
     thumbnail_url?: string;
+    thumbnailUrl?: string;
     filename?: string;
 };
 
+export type PhotoPage = {
+    photos: Photo[];
+    nextCursor: string | null;
+};
+
+// A cursor-paginated source of photos (library, search results, a tab's view).
+// `key` identifies the feed; a new feed object restarts pagination.
+// `renew` builds a fresh copy of the feed (e.g. to show new uploads) without any state the old one kept.
+export type PhotoFeed = {
+    key: string;
+    fetchPage: (cursor: string | null, limit: number) => Promise<PhotoPage>;
+    renew: () => PhotoFeed;
+};
+
 export type LLMResponse = {
     success: boolean;
     query: string;